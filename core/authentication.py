@@ -0,0 +1,69 @@
+import threading, time
+
+from collections import OrderedDict
+
+from users.models      import User
+from voicedoc.settings import USER_CACHE_SIZE, USER_CACHE_TTL
+
+class UserCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self.entries = OrderedDict()
+        self.lock    = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return user
+
+    def set(self, user, exp):
+        if self.maxsize <= 0:
+            return
+        expires_at = min(exp, time.time() + self.ttl) #토큰 만료 이후로는 캐시하지 않음
+        with self.lock:
+            self.entries[user.id] = (user, expires_at)
+            self.entries.move_to_end(user.id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+class TokenUser: #액세스 토큰의 클레임으로 만든 사용자, DB를 읽지 않음
+    def __init__(self, payload):
+        self.id        = payload['user_id']
+        self.name      = payload['name']
+        self.is_doctor = payload['is_doctor']
+
+def get_user(payload):
+    if 'is_doctor' in payload:
+        return TokenUser(payload)
+    user = user_cache.get(payload['user_id'])
+    if user is None:
+        user = User.objects.get(id=payload['user_id'])
+        user_cache.set(user, payload['exp'])
+    return user
+
+async def aget_user(payload):
+    if 'is_doctor' in payload:
+        return TokenUser(payload)
+    user = user_cache.get(payload['user_id'])
+    if user is None:
+        user = await User.objects.aget(id=payload['user_id'])
+        user_cache.set(user, payload['exp'])
+    return user
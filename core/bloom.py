@@ -0,0 +1,23 @@
+import hashlib, math
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size     = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes   = max(1, round(self.size / capacity * math.log(2)))
+        self.bits     = bytearray((self.size + 7) // 8)
+        self.count    = 0
+
+    def positions(self, key): #해시 두 개를 조합해 k개의 위치를 만듦
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first  = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key): #False면 확실히 없음, True면 있을 수도 있음
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
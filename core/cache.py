@@ -0,0 +1,41 @@
+import time
+
+from django.core.cache import cache
+
+def get_version(namespace):
+    key     = f'{namespace}:version'
+    version = cache.get(key)
+    if version is None: #캐시가 비워져도 예전 버전과 겹치지 않도록 시간값으로 시작
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+async def aget_version(namespace): #async 뷰에서는 캐시 호출만 스레드에서 실행
+    key     = f'{namespace}:version'
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+def bump_version(namespace):
+    try:
+        return cache.incr(f'{namespace}:version')
+    except ValueError:
+        cache.set(f'{namespace}:version', time.time_ns(), None)
+
+def get_or_build(namespace, key, builder, timeout=None, version=None):
+    cache_key = f'{namespace}:{version or get_version(namespace)}:{key}'
+    value     = cache.get(cache_key)
+    if value is None:
+        value = builder()
+        cache.set(cache_key, value, timeout)
+    return value
+
+async def aget_or_build(namespace, key, builder, timeout=None, version=None): #builder는 코루틴 함수
+    cache_key = f'{namespace}:{version or await aget_version(namespace)}:{key}'
+    value     = await cache.aget(cache_key)
+    if value is None:
+        value = await builder()
+        await cache.aset(cache_key, value, timeout)
+    return value
@@ -0,0 +1,28 @@
+import hashlib
+
+from django.http       import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+def make_etag(*parts):
+    return '"' + hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest() + '"'
+
+def is_not_modified(request, etag):
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in etags or '*' in etags
+
+def conditional_response(request, etag, builder):
+    if is_not_modified(request, etag): #응답을 만들기 전에 304로 종료
+        return HttpResponseNotModified(headers = {'ETag' : etag})
+    response = builder()
+    if response.status_code == 200:
+        response['ETag'] = etag
+    return response
+
+async def aconditional_response(request, etag, builder): #builder는 응답을 돌려주는 코루틴 함수
+    if is_not_modified(request, etag):
+        return HttpResponseNotModified(headers = {'ETag' : etag})
+    response = await builder()
+    if response.status_code == 200:
+        response['ETag'] = etag
+    return response
+
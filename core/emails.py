@@ -0,0 +1,116 @@
+import threading, time
+
+from asgiref.sync import sync_to_async
+from collections  import OrderedDict
+
+from core.bloom        import BloomFilter
+from core.cache        import get_version
+from users.models      import User
+from voicedoc.settings import EMAIL_FILTER_CAPACITY, EMAIL_FILTER_ERROR_RATE, EMAIL_FILTER_REFRESH, \
+                              EMAIL_FILTER_REBUILD, EMAIL_CHECK_TTL, EMAIL_CHECK_CACHE_SIZE
+
+class EmailIndex:
+    def __init__(self, capacity, error_rate, refresh, rebuild, ttl, maxsize):
+        self.capacity     = capacity
+        self.error_rate   = error_rate
+        self.refresh      = refresh
+        self.rebuild      = rebuild
+        self.ttl          = ttl
+        self.maxsize      = maxsize
+        self.filter       = None
+        self.last_id      = 0
+        self.built_at     = 0
+        self.refreshed_at = 0
+        self.version      = None
+        self.results      = OrderedDict() #email -> (exists, expires_at)
+        self.lock         = threading.Lock()
+        self.building     = threading.Lock() #전체 재구성은 한 스레드만
+
+    def stale(self): #다른 프로세스의 가입은 캐시 버전으로 바로 알고, 캐시를 공유하지 않으면 refresh 주기로 가져옴
+        now = time.monotonic()
+        return self.filter is None or now - self.refreshed_at >= self.refresh or get_version('emails') != self.version
+
+    def outdated(self, now):
+        return self.filter is None or now - self.built_at >= self.rebuild or self.filter.count > self.filter.capacity
+
+    def build(self, now):
+        capacity = max(self.capacity, User.objects.count() * 2)
+        bloom    = BloomFilter(capacity, self.error_rate)
+        last_id  = 0
+        for user_id, email in User.objects.order_by().values_list('id', 'email').iterator(chunk_size=5000):
+            bloom.add(email.lower())
+            last_id = max(last_id, user_id)
+        with self.lock:
+            self.filter, self.last_id, self.built_at = bloom, last_id, now
+
+    def load(self):
+        now     = time.monotonic()
+        version = get_version('emails') #행을 읽기 전의 버전을 기록해야 그 사이의 가입을 다음 확인 때 다시 가져옴
+        built   = False
+        if self.outdated(now):
+            #삭제/변경된 이메일은 필터에서 뺄 수 없으므로 주기적으로 전체를 다시 읽음
+            #필터가 있으면 다른 스레드가 재구성하는 동안 기다리지 않고 이전 필터를 계속 사용
+            if self.building.acquire(blocking = self.filter is None):
+                try:
+                    if self.outdated(now): #기다리는 동안 다른 스레드가 이미 만들었을 수 있음
+                        self.build(now)
+                        built = True
+                finally:
+                    self.building.release()
+        if not built: #다른 프로세스에서 가입한 이메일만 pk 범위로 가져옴
+            self.add_rows(User.objects.filter(id__gt = self.last_id).values_list('id', 'email'))
+        if version != self.version: #다른 프로세스의 가입으로 저장된 '없음' 결과가 틀렸을 수 있음
+            with self.lock:
+                self.results.clear()
+        self.refreshed_at, self.version = now, version
+
+    def add_rows(self, rows):
+        with self.lock:
+            for user_id, email in rows:
+                self.filter.add(email.lower()) #MySQL 기본 collation은 대소문자를 구분하지 않으므로 소문자로 저장
+                self.last_id = max(self.last_id, user_id)
+
+    def probe(self, email):
+        if email.lower() not in self.filter:
+            return False
+        with self.lock:
+            entry = self.results.get(email)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+        return None
+
+    def remember(self, email, exists):
+        with self.lock:
+            self.results[email] = (exists, time.monotonic() + self.ttl)
+            self.results.move_to_end(email)
+            while len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+        return exists
+
+    def exists(self, email):
+        if self.stale():
+            self.load()
+        found = self.probe(email)
+        if found is None: #필터에 걸린 경우에만 DB 확인
+            found = self.remember(email, User.objects.filter(email = email).exists())
+        return found
+
+    async def aexists(self, email): #캐시 버전 확인과 필터 갱신이 이벤트 루프를 막지 않도록 스레드에서 실행
+        return await sync_to_async(self.exists)(email)
+
+    def added(self, user):
+        if self.filter is not None:
+            self.add_rows([(user.id, user.email)])
+        self.discard(user.email) #롤백될 수도 있으므로 결과는 저장하지 않고 다음 확인 때 DB를 읽음
+
+    def discard(self, email):
+        with self.lock:
+            self.results.pop(email, None)
+
+    def clear(self):
+        with self.lock:
+            self.filter = None
+            self.results.clear()
+
+email_index = EmailIndex(EMAIL_FILTER_CAPACITY, EMAIL_FILTER_ERROR_RATE, EMAIL_FILTER_REFRESH,
+                         EMAIL_FILTER_REBUILD, EMAIL_CHECK_TTL, EMAIL_CHECK_CACHE_SIZE)
@@ -0,0 +1,89 @@
+import asyncio, math, threading
+
+from collections import defaultdict, deque
+
+from core.responses    import dumps
+from voicedoc.settings import EVENT_BROKER, EVENT_BUFFER_SIZE, EVENT_RETRY, EVENT_WAIT
+
+from django.db                   import transaction
+from django.utils.module_loading import import_string
+
+class LocalBroker:
+    def __init__(self, size):
+        self.events  = deque(maxlen=size) #(id, channel, event, data)
+        self.last_id = 0
+        self.waiters = defaultdict(set) #channel -> {(loop, ready)}, 해당 채널의 대기자만 깨움
+        self.lock    = threading.Lock()
+
+    def publish(self, channel, event, data):
+        with self.lock:
+            self.last_id += 1
+            event_id = self.last_id
+            self.events.append((event_id, channel, event, data))
+            waiters = list(self.waiters.get(channel, ()))
+        for waiter in waiters: #발행은 동기 스레드에서, 대기는 이벤트 루프에서 일어남
+            loop, ready = waiter
+            try:
+                if loop.is_closed():
+                    raise RuntimeError('event loop is closed')
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError: #연결이 끊겨 루프가 닫힌 요청은 커밋된 예약 응답을 실패시키지 않고 버림
+                self.remove(waiter)
+        return event_id
+
+    def add(self, waiter, channels):
+        with self.lock:
+            for channel in channels:
+                self.waiters[channel].add(waiter)
+
+    def remove(self, waiter, channels=None):
+        with self.lock:
+            for channel in list(self.waiters) if channels is None else channels:
+                waiters = self.waiters.get(channel)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self.waiters[channel]
+
+    def since(self, channels, last_id):
+        with self.lock:
+            return [event for event in self.events if event[0] > last_id and event[1] in channels]
+
+    def expired(self, last_id): #버퍼에서 밀려난 이벤트가 있으면 클라이언트가 다시 조회해야 함
+        with self.lock:
+            return bool(self.events) and last_id < self.events[0][0] - 1
+
+    async def listen(self, channels, last_id, timeout):
+        if not math.isfinite(timeout): #nan이면 남은 시간 비교가 항상 거짓이라 끝나지 않음
+            raise ValueError('timeout must be finite')
+        loop   = asyncio.get_running_loop()
+        ready  = asyncio.Event()
+        waiter = (loop, ready)
+        until  = loop.time() + min(max(timeout, 0), EVENT_WAIT)
+        self.add(waiter, channels)
+        try:
+            while True:
+                ready.clear()
+                events    = self.since(channels, last_id)
+                remaining = until - loop.time()
+                if events or remaining <= 0:
+                    return events
+                try:
+                    await asyncio.wait_for(ready.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.remove(waiter, channels)
+
+broker = import_string(EVENT_BROKER)(EVENT_BUFFER_SIZE)
+
+def publish(channel, event, data):
+    transaction.on_commit(lambda: broker.publish(channel, event, data)) #롤백된 예약은 알리지 않음
+
+def stream(events, last_id):
+    frames = [f'retry: {EVENT_RETRY}\n\n']
+    for event_id, channel, event, data in events:
+        frames.append(f'id: {event_id}\nevent: {event}\ndata: {dumps(data).decode()}\n\n')
+    if not events: #이벤트가 없어도 재접속 시 Last-Event-ID가 이어지도록 id만 전달
+        frames.append(f'id: {last_id}\n\n')
+    return ''.join(frames)
@@ -1,14 +1,14 @@
-import jwt
+import asyncio, jwt
 
 from datetime import datetime, timedelta
 
-from django.http  import JsonResponse
+from users.models        import User
+from core.authentication import get_user, aget_user
+from core.responses      import JsonResponse
+from voicedoc.settings   import SECRET, ALGORITHM, ACCESS_TOKEN_MINUTES
 
-from users.models      import User
-from voicedoc.settings import SECRET, ALGORITHM
-
-def jwt_generator(user_id):
-    payload = {'user_id' : user_id, 'exp' : datetime.utcnow()+ timedelta(hours=1)}
+def jwt_generator(user_id, **claims):
+    payload = {'user_id' : user_id, 'exp' : datetime.utcnow()+ timedelta(minutes=ACCESS_TOKEN_MINUTES), **claims}
     encoded = jwt.encode(payload, SECRET, algorithm = ALGORITHM)
     return encoded
 
@@ -19,34 +19,46 @@ def jwt_decoder(token):
     except jwt.exceptions.ExpiredSignatureError:
         raise KeyError
     
-def signin_decorator(func):
-    def wrapper(self, request, *args, **kwargs):
-        try:
-            token = request.headers.get("Authorization", None)
-            request.user = User.objects.get(id=jwt_decoder(token)['user_id'])
-            request.payload = jwt_decoder(token)
-            return func(self, request, *args, **kwargs)
+FORBIDDEN = {
+    True  : "patient can't access to doctor menu",
+    False : "doctor can't access to patient menu",
+}
+
+def authorize(request, user, is_doctor): #인증된 사용자를 요청에 붙이고 역할이 맞지 않으면 403 응답
+    request.user = user
+    if is_doctor is not None and user.is_doctor != is_doctor:
+        return JsonResponse({'message': FORBIDDEN[is_doctor]}, status = 403)
+
+def rejected(error):
+    if isinstance(error, User.DoesNotExist):
+        return JsonResponse({'message' : 'IVALID_USER'}, status=401)
+    return JsonResponse({'message' : 'signin time expired'})
 
-        except User.DoesNotExist:
-            return JsonResponse({'message' : 'IVALID_USER'}, status=401)
-        except KeyError:
-            return JsonResponse({'message' : 'signin time expired'})
-    return wrapper
+def auth_decorator(is_doctor=None):
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func): #async 뷰는 사용자 조회만 await
+            async def async_wrapper(self, request, *args, **kwargs):
+                try:
+                    request.payload = jwt_decoder(request.headers.get("Authorization", None))
+                    return authorize(request, await aget_user(request.payload), is_doctor)\
+                           or await func(self, request, *args, **kwargs)
+                except (User.DoesNotExist, KeyError) as e:
+                    return rejected(e)
+            return async_wrapper
 
-def patient_decorator(func):
-    def wrapper(self, request, *args, **kwargs):
-        try:
-            token = request.headers.get("Authorization", None)
-            request.user = User.objects.get(id=jwt_decoder(token)['user_id'])
-            if request.user.is_doctor == True : 
-                return JsonResponse({'message': "doctor can't access to patient menu"}, status = 403)
-            return func(self, request, *args, **kwargs)
+        def wrapper(self, request, *args, **kwargs):
+            try:
+                request.payload = jwt_decoder(request.headers.get("Authorization", None))
+                return authorize(request, get_user(request.payload), is_doctor)\
+                       or func(self, request, *args, **kwargs)
+            except (User.DoesNotExist, KeyError) as e:
+                return rejected(e)
+        return wrapper
+    return decorator
 
-        except User.DoesNotExist:
-            return JsonResponse({'message' : 'IVALID_USER'}, status=401)
-        except KeyError:
-            return JsonResponse({'message' : 'signin time expired'})
-    return wrapper
+signin_decorator  = auth_decorator()
+patient_decorator = auth_decorator(is_doctor = False)
+doctor_decorator  = auth_decorator(is_doctor = True)
 
 def convertor(day, time):
     date = '()'
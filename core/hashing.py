@@ -0,0 +1,116 @@
+import asyncio, logging, multiprocessing, threading
+
+from concurrent.futures         import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from voicedoc.settings import PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE
+
+from django.contrib.auth.hashers import make_password, identify_hasher, get_hasher
+
+logger = logging.getLogger(__name__)
+
+class HashingBusy(Exception):
+    pass
+
+def setup(): #fork가 아닌 방식으로 뜬 작업 프로세스는 설정을 다시 읽어야 함
+    import django
+    django.setup()
+
+def verify(password, encoded):
+    try:
+        hasher = identify_hasher(encoded)
+    except (TypeError, ValueError): #사용할 수 없는 비밀번호
+        return False, None
+    if not hasher.verify(password, encoded):
+        return False, None
+    preferred = get_hasher('default')
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded): #해셔나 반복 횟수가 바뀌었으면 같은 작업 안에서 다시 해싱
+        return True, make_password(password)
+    return True, None
+
+class HashingPool:
+    def __init__(self, workers, queue):
+        self.workers  = workers
+        self.queue    = queue
+        self.executor = None
+        self.pending  = 0
+        self.counts   = {'completed' : 0, 'rejected' : 0, 'rehashed' : 0}
+        self.lock     = threading.Lock()
+
+    def submit(self, func, *args):
+        if self.workers <= 0: #작업 프로세스 없이 요청 스레드에서 실행
+            future = Future()
+            future.set_result(func(*args))
+            return future
+        with self.lock:
+            busy = self.pending >= self.workers + self.queue
+            if busy: #대기열이 가득 차면 워커를 잡아두지 않고 바로 거절
+                self.counts['rejected'] += 1
+            else:
+                self.pending += 1
+        if busy: #대기열 지표는 외부에 공개하지 않고 로그로만 남김
+            logger.warning('password hashing queue is full: %s', self.stats())
+            raise HashingBusy('too many password requests')
+        try:
+            future = self.start(func, *args)
+        except BaseException:
+            with self.lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self.done)
+        return future
+
+    def start(self, func, *args):
+        for retry in (True, False):
+            with self.lock:
+                if self.executor is None: #멀티스레드 앱 서버에서 fork하지 않도록 spawn으로 띄움
+                    self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                        initializer=setup)
+                executor = self.executor
+            try:
+                return executor.submit(func, *args)
+            except BrokenProcessPool: #작업 프로세스가 죽은 풀은 버리고 새 풀로 한 번 더 시도
+                self.reset(executor)
+                if not retry:
+                    raise
+
+    def reset(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False)
+
+    def done(self, future):
+        with self.lock:
+            self.pending -= 1
+            self.counts['completed'] += 1
+
+    def rehashed(self, result):
+        if result[1] is not None:
+            with self.lock:
+                self.counts['rehashed'] += 1
+        return result
+
+    def make(self, password):
+        return self.submit(make_password, password).result()
+
+    async def amake(self, password):
+        return await asyncio.wrap_future(self.submit(make_password, password))
+
+    def check(self, password, encoded):
+        return self.rehashed(self.submit(verify, password, encoded).result())
+
+    async def acheck(self, password, encoded):
+        return self.rehashed(await asyncio.wrap_future(self.submit(verify, password, encoded)))
+
+    def stats(self):
+        with self.lock:
+            return {
+                'workers' : self.workers,
+                'running' : min(self.pending, self.workers),
+                'queued'  : max(self.pending - self.workers, 0),
+                'limit'   : self.queue,
+                **self.counts
+            }
+
+hashing_pool = HashingPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
@@ -0,0 +1,85 @@
+import os, tempfile
+
+from io import BytesIO
+
+from voicedoc.settings import IP_ADDRESS, IMAGE_VARIANT_SIZES
+
+from django.core.cache         import cache
+from django.core.files.base    import ContentFile
+from django.core.files.storage import default_storage
+
+try:
+    from PIL import Image
+except ImportError: #Pillow가 없으면 원본 이미지를 그대로 사용
+    Image = None
+
+VARIANT_ROOT         = 'variants'
+VARIANT_MISS_SECONDS = 60 #아직 없는 썸네일은 잠시 뒤 다시 확인
+
+def variant_name(name, size):
+    return f'{VARIANT_ROOT}/{size}/{name}.webp'
+
+def variant_key(name, size):
+    return f'images:variant:{size}:{name}'
+
+def store(name, content):
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError: #로컬 경로가 없는 저장소는 같은 이름에 그대로 저장
+        default_storage.delete(name)
+        return default_storage.save(name, ContentFile(content))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path) #동시에 만들어도 접미사 붙은 복사본 없이 한 파일만 남음
+    except OSError:
+        os.remove(temporary)
+        raise
+    return name
+
+def generate(name, size):
+    pixels = IMAGE_VARIANT_SIZES[size]
+    with default_storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        image.thumbnail((pixels, pixels))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        output = BytesIO()
+        image.save(output, format='WEBP', quality=80)
+    return store(variant_name(name, size), output.getvalue())
+
+def variant(name, size): #업로드/수집 시점에 호출해 썸네일을 미리 만듦
+    if Image is None or not name or size not in IMAGE_VARIANT_SIZES:
+        return name
+
+    resized = variant_name(name, size)
+    if not default_storage.exists(resized):
+        try:
+            generate(name, size)
+        except (OSError, ValueError): #이미지가 아니거나 원본이 없으면 원본 경로 유지
+            return name
+    cache.set(variant_key(name, size), True, None)
+    return resized
+
+def ready(names, size): #요청 중에는 만들지 않고 이미 있는 썸네일만 찾음
+    if Image is None or size not in IMAGE_VARIANT_SIZES:
+        return set()
+
+    keys  = {variant_key(name, size) : name for name in names}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys(): #다른 프로세스가 만든 썸네일은 파일로 한 번만 확인하고 기억
+        found[key] = default_storage.exists(variant_name(keys[key], size))
+        cache.set(key, found[key], None if found[key] else VARIANT_MISS_SECONDS)
+    return {keys[key] for key, exists in found.items() if exists}
+
+def apply_variants(rows, field, url_field, size):
+    available = ready({row[field] for row in rows if row[field]}, size)
+    for row in rows:
+        name = row.pop(field)
+        if name:
+            row[url_field] = IP_ADDRESS + (variant_name(name, size) if name in available else name)
+    return rows
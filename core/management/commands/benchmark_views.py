@@ -0,0 +1,40 @@
+import statistics, time
+
+from django.core.management.base import BaseCommand
+from django.db                   import connections
+from django.test                 import Client
+
+from core.functions    import jwt_generator
+from users.models      import User
+from voicedoc.settings import DB_DRIVER
+
+class Command(BaseCommand):
+    help = 'measure API latency with the current DB_DRIVER / DB_CONN_MAX_AGE (run once per configuration)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, required=True, help='patient account used to sign requests')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--url', action='append', dest='urls',
+                            help='path to request, can be repeated (default: subject and reservation list)')
+
+    def handle(self, *args, **options):
+        user   = User.objects.get(id = options['user_id'])
+        client = Client()
+        header = {'HTTP_Authorization' : jwt_generator(user.id)}
+        urls   = options['urls'] or ['/reservations/subject', '/reservations/list']
+        conn   = connections['default'].settings_dict
+
+        self.stdout.write(f"driver={DB_DRIVER} CONN_MAX_AGE={conn['CONN_MAX_AGE']}")
+        for url in urls:
+            client.get(url, **header) #워밍업
+            timings = []
+            for _ in range(options['requests']):
+                start = time.perf_counter()
+                client.get(url, **header)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{url}: mean={statistics.mean(timings):.2f}ms '
+                f'p50={timings[len(timings) // 2]:.2f}ms '
+                f'p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms'
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core                import images
+from reservations.models import ReservationImage
+from users.models        import Doctor, Subject
+from voicedoc.settings   import IMAGE_VARIANT_SIZES
+
+class Command(BaseCommand):
+    help = 'pre-generate resized webp variants for doctor, subject and reservation images'
+
+    def handle(self, *args, **options):
+        names = set(Doctor.objects.values_list('profile_image', flat=True))\
+              | set(Subject.objects.exclude(image = None).values_list('image', flat=True))\
+              | set(ReservationImage.objects.values_list('image', flat=True))
+
+        for name in sorted(filter(None, names)):
+            for size in IMAGE_VARIANT_SIZES:
+                images.variant(name, size)
+        self.stdout.write(f'generated variants for {len(names)} images')
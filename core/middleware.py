@@ -0,0 +1,32 @@
+from voicedoc.settings import MIDDLEWARE_PROFILES, MIDDLEWARE_PROFILE_PATHS
+
+from django.core.exceptions          import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.exception  import convert_exception_to_response
+from django.utils.deprecation        import MiddlewareMixin
+from django.utils.module_loading     import import_string
+
+VIEW_HOOKS = ('process_view', 'process_exception', 'process_template_response')
+
+def build(paths, get_response):
+    handler = get_response
+    for path in reversed(paths):
+        middleware = import_string(path)
+        if any(hasattr(middleware, hook) for hook in VIEW_HOOKS): #view 단계 훅은 장고가 MIDDLEWARE에 있는 것만 호출
+            raise ImproperlyConfigured(f'{path} uses view hooks, keep it in MIDDLEWARE')
+        if not getattr(middleware, 'async_capable', False) or not getattr(middleware, 'sync_capable', True):
+            raise ImproperlyConfigured(f'{path} must support both sync and async requests')
+        try:
+            handler = convert_exception_to_response(middleware(handler))
+        except MiddlewareNotUsed:
+            continue
+    return handler
+
+class ProfileMiddleware(MiddlewareMixin): #경로의 첫 부분에 따라 다른 미들웨어 묶음을 실행
+    def __init__(self, get_response):
+        super().__init__(get_response) #get_response가 async면 이 미들웨어도 async로 동작
+        self.chains   = {name : build(paths, get_response) for name, paths in MIDDLEWARE_PROFILES.items()}
+        self.profiles = {prefix : self.chains[name] for prefix, name in MIDDLEWARE_PROFILE_PATHS.items()}
+
+    def __call__(self, request):
+        prefix = request.path_info.split('/', 2)[1]
+        return self.profiles.get(prefix, self.chains['full'])(request)
@@ -0,0 +1,52 @@
+import base64, binascii, json
+
+from django.core.exceptions       import ValidationError
+from django.core.paginator        import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models             import Q
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError('invalid cursor')
+
+def keyset_filter(fields, values):
+    condition = Q()
+    for index, field in enumerate(fields): #(a > x) or (a = x and b > y) or ...
+        lookups = {fields[i] : values[i] for i in range(index)}
+        lookups[f'{field}__gt'] = values[index]
+        condition |= Q(**lookups)
+    return condition
+
+def keyset_query(queryset, fields, cursor, limit):
+    if cursor:
+        values = decode_cursor(cursor)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError('invalid cursor')
+        try:
+            queryset = queryset.filter(keyset_filter(fields, values))
+        except (TypeError, ValidationError):
+            raise ValueError('invalid cursor')
+    return queryset.order_by(*fields)[:limit + 1] #한개 더 읽어서 다음 페이지 유무 확인
+
+def keyset_result(rows, fields, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows        = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][field] for field in fields])
+    return rows, next_cursor
+
+def keyset_page(queryset, fields, cursor, limit):
+    return keyset_result(list(keyset_query(queryset, fields, cursor, limit)), fields, limit)
+
+async def akeyset_page(queryset, fields, cursor, limit):
+    return keyset_result([row async for row in keyset_query(queryset, fields, cursor, limit)], fields, limit)
+
+async def apage(queryset, number, limit): #Paginator와 같은 페이지 검증, COUNT와 목록만 async로 읽음
+    paginator       = Paginator(queryset, limit)
+    paginator.count = await queryset.acount()
+    return [row async for row in paginator.page(number).object_list]
@@ -0,0 +1,47 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http                  import HttpResponse, StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError: #orjson이 없으면 표준 json으로 직렬화
+    orjson = None
+
+STREAM_ROWS = 1000 #이보다 긴 목록은 나눠서 전송
+CHUNK_ROWS  = 500
+
+encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+def dumps(data):
+    if orjson is not None:
+        #날짜/시간은 DjangoJSONEncoder와 같은 형식(밀리초, UTC는 Z)으로 쓰도록 encoder에 넘김
+        return orjson.dumps(data, default=encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return encoder.encode(data).encode()
+
+def format_columns(rows, **formats): #date/time 컬럼을 미리 문자열로 바꿔 encoder의 default 호출을 피함
+    for row in rows:
+        for field, pattern in formats.items():
+            if row[field] is not None:
+                row[field] = row[field].strftime(pattern)
+    return rows
+
+class JsonResponse(HttpResponse):
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
+
+class JsonStreamResponse(StreamingHttpResponse):
+    def __init__(self, rows, extra, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(streaming_content=self.chunks(rows, extra), **kwargs)
+
+    def chunks(self, rows, extra):
+        fields = dumps(extra)[1:-1]
+        yield b'{' + (fields + b',' if fields else b'') + b'"result":['
+        for start in range(0, len(rows), CHUNK_ROWS):
+            yield (b',' if start else b'') + dumps(rows[start:start + CHUNK_ROWS])[1:-1]
+        yield b']}'
+
+def list_response(rows, status=200, **extra):
+    if len(rows) > STREAM_ROWS:
+        return JsonStreamResponse(rows, extra, status=status)
+    return JsonResponse({'result' : rows, **extra}, status=status)
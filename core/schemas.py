@@ -0,0 +1,120 @@
+import json, math, re
+
+from datetime import date, time
+
+MISSING = object()
+
+DATE_PATTERN = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$') #모듈 로드 시 한 번만 컴파일
+TIME_PATTERN = re.compile(r'^(\d{2}):(\d{2})$')
+
+class SchemaError(ValueError): #기존 뷰의 except ValueError에서도 그대로 잡힘
+    pass
+
+class Field:
+    def __init__(self, required=True, default=None, many=False):
+        self.required = required
+        self.default  = default
+        self.many     = many
+
+    def coerce(self, value):
+        return value
+
+class String(Field):
+    def __init__(self, pattern=None, message=None, max_length=None, choices=None, **kwargs):
+        super().__init__(**kwargs)
+        self.pattern    = pattern
+        self.message    = message
+        self.max_length = max_length
+        self.choices    = choices
+
+    def coerce(self, value):
+        if not isinstance(value, str):
+            raise SchemaError('not a string')
+        if self.max_length is not None and len(value) > self.max_length:
+            raise SchemaError(self.message or 'too long')
+        if self.pattern is not None and not self.pattern.match(value):
+            raise SchemaError(self.message or 'invalid format')
+        if self.choices is not None and value not in self.choices:
+            raise SchemaError(self.message or 'invalid choice')
+        return value
+
+class Integer(Field):
+    def __init__(self, min_value=None, max_value=None, **kwargs):
+        super().__init__(**kwargs)
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def coerce(self, value):
+        if isinstance(value, bool) or not isinstance(value, (int, str)): #JSON의 true/1.5 등은 거절
+            raise SchemaError('not an integer')
+        value = int(value)
+        if (self.min_value is not None and value < self.min_value) or (self.max_value is not None and value > self.max_value):
+            raise SchemaError('out of range')
+        return value
+
+class Number(Integer):
+    def coerce(self, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise SchemaError('not a number')
+        value = float(value)
+        if not math.isfinite(value): #'nan'/'inf'는 float()가 받아들이고 nan은 범위 비교도 통과함
+            raise SchemaError('not a number')
+        if (self.min_value is not None and value < self.min_value) or (self.max_value is not None and value > self.max_value):
+            raise SchemaError('out of range')
+        return value
+
+class Date(Field):
+    def coerce(self, value): #YYYY-MM-DD
+        match = DATE_PATTERN.match(value) if isinstance(value, str) else None
+        if match is None:
+            raise SchemaError('not in date format')
+        return date(int(match[1]), int(match[2]), int(match[3]))
+
+class Time(Field):
+    def coerce(self, value): #HH:MM
+        match = TIME_PATTERN.match(value) if isinstance(value, str) else None
+        if match is None:
+            raise SchemaError('not in time format')
+        return time(int(match[1]), int(match[2]))
+
+class Schema:
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def parse(self, data):
+        values = {}
+        for name, field in self.fields.items(): #필수 값이 빠졌으면 형식 검사 전에 KeyError
+            if name in data:
+                values[name] = data.getlist(name) if field.many and hasattr(data, 'getlist') else data[name]
+            elif field.required:
+                raise KeyError(name)
+            else:
+                values[name] = MISSING
+
+        for name, field in self.fields.items():
+            value = values[name]
+            if value is MISSING or (value is None and not field.required):
+                values[name] = field.default
+                continue
+            try:
+                if field.many:
+                    if not isinstance(value, list):
+                        raise SchemaError('not a list')
+                    values[name] = [field.coerce(item) for item in value]
+                else:
+                    values[name] = field.coerce(value)
+            except (TypeError, ValueError) as e:
+                raise SchemaError(f'{e}' if isinstance(e, SchemaError) else f'invalid {name}')
+        return values
+
+    def load(self, body):
+        return self.parse(decode(body))
+
+def decode(body):
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise SchemaError('invalid json')
+    if not isinstance(data, dict):
+        raise SchemaError('invalid json')
+    return data
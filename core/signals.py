@@ -0,0 +1,21 @@
+from core.authentication import user_cache
+from core.cache          import bump_version
+from core.emails         import email_index
+from users.models        import User
+
+from django.db                import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch          import receiver
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_cache.invalidate(instance.id)
+
+@receiver(post_save, sender=User)
+def user_email_saved(sender, instance, **kwargs): #이메일이 바뀐 경우도 새 이메일을 필터에 추가
+    email_index.added(instance)
+    transaction.on_commit(lambda: bump_version('emails')) #다른 프로세스의 필터도 다음 확인 때 새 가입을 가져오도록
+
+@receiver(post_delete, sender=User)
+def user_email_deleted(sender, instance, **kwargs):
+    email_index.discard(instance.email)
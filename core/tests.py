@@ -1,3 +1,370 @@
-from django.test import TestCase
+import asyncio, json, os, threading, time
 
-# Create your tests here.
+from datetime    import date, datetime, timezone, time as clock
+from unittest    import skipIf
+from django.test import TestCase, Client, RequestFactory
+from django.http import QueryDict, HttpResponse
+from django.core.files.storage import default_storage
+from django.core.cache         import cache
+from asgiref.sync               import sync_to_async
+from concurrent.futures.process import BrokenProcessPool
+
+from core                import images, responses
+from core.bloom          import BloomFilter
+from core.schemas        import Schema, SchemaError, String, Integer, Number, Date, Time
+from core.middleware     import ProfileMiddleware
+from core.events         import LocalBroker, stream
+from core.hashing        import HashingPool, HashingBusy
+from users.models        import User, Subject
+from core.authentication import UserCache, user_cache
+from core.functions      import jwt_generator, doctor_decorator
+from voicedoc.settings   import IP_ADDRESS, IMAGE_VARIANT_SIZES
+
+class UserCacheTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        User.objects.create(
+            name = '환자1',
+            email = 'patient1@gmail.com',
+            password = '1q2w3e4r',
+            is_doctor = False
+        )
+
+    def test_cached_user_skips_query(self):
+        client = Client()
+        user   = User.objects.get(name = '환자1')
+        header = {'HTTP_Authorization' : jwt_generator(user.id)}
+
+        client.post('/users/check', **header)
+        with self.assertNumQueries(0):
+            response = client.post('/users/check', **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['your id'], user.id)
+
+    def test_user_save_invalidates_cache(self):
+        user = User.objects.get(name = '환자1')
+        user_cache.set(user, time.time() + 60)
+
+        user.name = '환자2'
+        user.save()
+
+        self.assertIsNone(user_cache.get(user.id))
+
+    def test_entry_expires_with_token(self):
+        cache = UserCache(10, 60)
+        user  = User.objects.get(name = '환자1')
+        cache.set(user, time.time() - 1)
+
+        self.assertIsNone(cache.get(user.id))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = UserCache(2, 60)
+        users = [User(id = i, name = f'user{i}') for i in range(1, 4)]
+        for user in users:
+            cache.set(user, time.time() + 60)
+
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(3).name, 'user3')
+
+class AuthDecoratorTest(TestCase):
+    class Views:
+        @doctor_decorator
+        def get(self, request):
+            return HttpResponse('ok')
+
+        @doctor_decorator
+        async def aget(self, request):
+            return HttpResponse('ok')
+
+    def setUp(self):
+        user_cache.clear()
+        User.objects.create(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False)
+
+    def requests(self):
+        user = User.objects.get(name = '환자1')
+        return (RequestFactory().get('/', HTTP_Authorization = jwt_generator(user.id)),
+                RequestFactory().get('/', HTTP_Authorization = jwt_generator(user.id + 100)))
+
+    def test_sync_view_checks(self):
+        request, missing = self.requests()
+
+        response = self.Views().get(request)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(json.loads(response.content), {'message' : "patient can't access to doctor menu"})
+        self.assertEqual(self.Views().get(missing).status_code, 401)
+
+    async def test_async_view_checks(self):
+        request, missing = await sync_to_async(self.requests)()
+
+        response = await self.Views().aget(request)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(json.loads(response.content), {'message' : "patient can't access to doctor menu"})
+        self.assertEqual((await self.Views().aget(missing)).status_code, 401)
+
+@skipIf(images.Image is None, 'Pillow is not installed')
+class ImageVariantTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        User.objects.create(
+            name = '환자1',
+            email = 'patient1@gmail.com',
+            password = '1q2w3e4r',
+            is_doctor = False
+        )
+        Subject.objects.create(name = '과목1', image = 'subject_images/child.png')
+
+    def tearDown(self):
+        for size in IMAGE_VARIANT_SIZES:
+            default_storage.delete(images.variant_name('subject_images/child.png', size))
+        cache.clear()
+
+    def test_variant_is_resized_webp(self):
+        name = images.variant('subject_images/child.png', 'small')
+
+        self.assertEqual(name, images.variant_name('subject_images/child.png', 'small'))
+        with default_storage.open(name, 'rb') as variant:
+            image = images.Image.open(variant)
+            self.assertEqual(image.format, 'WEBP')
+            self.assertLessEqual(max(image.size), IMAGE_VARIANT_SIZES['small'])
+
+    def test_unknown_size_keeps_original(self):
+        self.assertEqual(images.variant('subject_images/child.png', 'huge'), 'subject_images/child.png')
+
+    def test_variants_built_only_when_image_changes(self):
+        subject = Subject.objects.get(name = '과목1')
+        name    = images.variant_name('subject_images/child.png', 'small')
+
+        self.assertTrue(default_storage.exists(name)) #생성 시 만듦
+        default_storage.delete(name)
+
+        subject.name = '과목2'
+        subject.save()
+        self.assertFalse(default_storage.exists(name))
+
+        subject.image = 'subject_images/other.png'
+        subject.save()
+        subject.image = 'subject_images/child.png'
+        subject.save(update_fields = ['image'])
+        self.assertTrue(default_storage.exists(name))
+
+    def test_variant_generated_in_place(self):
+        name = images.variant_name('subject_images/child.png', 'small')
+        default_storage.delete(name)
+
+        self.assertEqual(images.generate('subject_images/child.png', 'small'), name)
+        self.assertEqual(images.generate('subject_images/child.png', 'small'), name) #다시 만들어도 접미사 붙은 복사본이 없음
+        self.assertEqual(len([file for file in default_storage.listdir(os.path.dirname(name))[1] if file.startswith('child')]), 1)
+
+    def test_missing_variant_serves_original(self):
+        client = Client()
+        header = {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+        for size in IMAGE_VARIANT_SIZES:
+            default_storage.delete(images.variant_name('subject_images/child.png', size))
+        cache.clear()
+
+        response = client.get('/reservations/subject?size=medium', **header)
+
+        self.assertEqual(response.json()['result'][0]['file_location'], IP_ADDRESS + 'subject_images/child.png')
+        self.assertFalse(default_storage.exists(images.variant_name('subject_images/child.png', 'medium'))) #요청 중에는 만들지 않음
+
+    def test_subject_endpoint_returns_variant_url(self):
+        client   = Client()
+        header   = {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+        response = client.get('/reservations/subject?size=small', **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'][0]['file_location'],
+                         IP_ADDRESS + images.variant_name('subject_images/child.png', 'small'))
+
+class EventBrokerTest(TestCase):
+    async def test_listener_wakes_on_publish_from_thread(self):
+        broker = LocalBroker(10)
+        loop   = asyncio.get_running_loop()
+        loop.call_later(0.05, lambda: threading.Thread(target = broker.publish,
+                                                       args = ('user:1', 'status-changed', {'status' : '진료취소'})).start())
+
+        events = await broker.listen({'user:1'}, 0, 5)
+
+        self.assertEqual([(event[1], event[2]) for event in events], [('user:1', 'status-changed')])
+
+    async def test_other_channels_time_out(self):
+        broker = LocalBroker(10)
+        broker.publish('doctor:1', 'slot-booked', {})
+
+        self.assertEqual(await broker.listen({'doctor:2'}, 0, 0.05), [])
+
+    def test_closed_loop_listener_is_dropped(self):
+        broker = LocalBroker(10)
+        loop   = asyncio.new_event_loop()
+        waiter = (loop, asyncio.Event())
+        broker.add(waiter, {'user:1'})
+        loop.close() #요청이 끊겨 루프가 닫힘
+
+        self.assertEqual(broker.publish('user:1', 'status-changed', {}), 1)
+        self.assertEqual(dict(broker.waiters), {})
+
+    async def test_only_channel_listeners_are_woken(self):
+        broker = LocalBroker(10)
+        loop   = asyncio.get_running_loop()
+        ready  = {channel : asyncio.Event() for channel in ('doctor:1', 'doctor:2')}
+        for channel, event in ready.items():
+            broker.add((loop, event), {channel})
+
+        broker.publish('doctor:1', 'slot-booked', {})
+        await asyncio.sleep(0)
+
+        self.assertTrue(ready['doctor:1'].is_set())
+        self.assertFalse(ready['doctor:2'].is_set())
+
+    async def test_non_finite_timeout_rejected(self):
+        broker = LocalBroker(10)
+
+        with self.assertRaises(ValueError):
+            await broker.listen({'user:1'}, 0, float('nan'))
+        self.assertEqual(await asyncio.wait_for(broker.listen({'user:1'}, 0, -1), 1), []) #음수는 0초로 맞춤
+
+    def test_expired_and_stream_format(self):
+        broker = LocalBroker(2)
+        for index in range(3):
+            broker.publish('doctor:1', 'slot-booked', {'time' : f'1{index}:00'})
+
+        self.assertTrue(broker.expired(0))
+        self.assertFalse(broker.expired(1))
+        self.assertEqual(stream(broker.since({'doctor:1'}, 2), 2),
+                         'retry: 1000\n\nid: 3\nevent: slot-booked\ndata: {"time":"12:00"}\n\n')
+        self.assertEqual(stream([], 3), 'retry: 1000\n\nid: 3\n\n')
+
+class JsonResponseTest(TestCase):
+    def test_dumps_dates_and_unicode(self):
+        data = {'date' : date(2022, 6, 1), 'time' : clock(10, 30), 'name' : '내과'}
+
+        self.assertEqual(json.loads(responses.dumps(data)), {'date' : '2022-06-01', 'time' : '10:30:00', 'name' : '내과'})
+
+    def test_datetime_wire_format(self): #orjson 사용 여부와 관계없이 DjangoJSONEncoder 형식 유지
+        data = {'at' : datetime(2022, 6, 1, 10, 30, 15, 123456, tzinfo = timezone.utc), 'time' : clock(10, 30, 15, 123456)}
+
+        self.assertEqual(responses.dumps(data), b'{"at":"2022-06-01T10:30:15.123Z","time":"10:30:15.123"}')
+
+    def test_format_columns(self):
+        rows = [{'date' : date(2022, 6, 1), 'time' : clock(10, 30)}, {'date' : None, 'time' : clock(9)}]
+
+        self.assertEqual(responses.format_columns(rows, date = "%Y-%m-%d", time = "%H:%M:%S"),
+                         [{'date' : '2022-06-01', 'time' : '10:30:00'}, {'date' : None, 'time' : '09:00:00'}])
+
+    def test_long_list_streams(self):
+        rows     = [{'id' : index} for index in range(responses.STREAM_ROWS + 1)]
+        response = responses.list_response(rows, next_cursor = 'abc')
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), {'next_cursor' : 'abc', 'result' : rows})
+
+    def test_short_list_is_buffered(self):
+        response = responses.list_response([], status = 201)
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content), {'result' : []})
+
+class HashingPoolTest(TestCase):
+    def test_full_queue_rejects(self):
+        pool    = HashingPool(1, 0)
+        running = pool.submit(time.sleep, 0.5)
+
+        with self.assertRaises(HashingBusy), self.assertLogs('core.hashing', 'WARNING'): #지표는 로그로만 남김
+            pool.submit(time.sleep, 0)
+        self.assertEqual(pool.stats(), {'workers' : 1, 'running' : 1, 'queued' : 0, 'limit' : 0,
+                                        'completed' : 0, 'rejected' : 1, 'rehashed' : 0})
+
+        running.result()
+        pool.executor.shutdown()
+        self.assertEqual(pool.stats()['completed'], 1)
+
+    def test_broken_pool_is_replaced(self):
+        pool = HashingPool(1, 1)
+
+        with self.assertRaises(BrokenProcessPool): #작업 프로세스가 죽음
+            pool.submit(os._exit, 1).result()
+        broken = pool.executor
+
+        self.assertEqual(pool.submit(abs, -1).result(), 1)
+        self.assertIsNot(pool.executor, broken)
+        pool.executor.shutdown()
+
+    def test_inline_check(self):
+        pool    = HashingPool(0, 0)
+        encoded = pool.make('1q2w3e4r')
+
+        self.assertEqual(pool.check('1q2w3e4r', encoded), (True, None))
+        self.assertEqual(pool.check('asdf1234', encoded), (False, None))
+        self.assertEqual(pool.check('1q2w3e4r', '!unusable'), (False, None))
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for index in range(1000):
+            bloom.add(f'user{index}@gmail.com')
+
+        self.assertTrue(all(f'user{index}@gmail.com' in bloom for index in range(1000)))
+        self.assertLess(sum(f'other{index}@gmail.com' in bloom for index in range(1000)), 50)
+
+class SchemaTest(TestCase):
+    schema = Schema(
+        id   = Integer(min_value = 1),
+        day  = Date(),
+        at   = Time(required = False),
+        ids  = Integer(required = False, default = (), many = True),
+        name = String(required = False, max_length = 3)
+    )
+
+    def test_coerces_query_values(self):
+        params = self.schema.parse(QueryDict('id=3&day=2022-06-01&at=09:30&ids=1&ids=2'))
+
+        self.assertEqual(params, {'id' : 3, 'day' : date(2022, 6, 1), 'at' : clock(9, 30), 'ids' : [1, 2], 'name' : None})
+
+    def test_missing_before_invalid(self):
+        with self.assertRaises(KeyError):
+            self.schema.parse({'id' : 'x'})
+
+    def test_invalid_values(self):
+        for data in ({'id' : 0, 'day' : '2022-06-01'}, {'id' : True, 'day' : '2022-06-01'},
+                     {'id' : 1, 'day' : '2022-02-30'}, {'id' : 1, 'day' : '2022-06-01', 'at' : '9:30'},
+                     {'id' : 1, 'day' : '2022-06-01', 'ids' : 1}, {'id' : 1, 'day' : '2022-06-01', 'name' : 'long'}):
+            with self.assertRaises(SchemaError):
+                self.schema.parse(data)
+
+    def test_load_rejects_non_object(self):
+        with self.assertRaises(SchemaError):
+            self.schema.load(b'[1]')
+
+    def test_number_rejects_non_finite(self):
+        field = Number(min_value = 0, max_value = 10)
+
+        self.assertEqual(field.coerce('2.5'), 2.5)
+        for value in ('nan', 'inf', '-inf', float('nan')):
+            with self.assertRaises(SchemaError):
+                field.coerce(value)
+
+class ProfileMiddlewareTest(TestCase):
+    def test_api_paths_skip_session(self):
+        middleware = ProfileMiddleware(lambda request: HttpResponse(str(hasattr(request, 'session'))))
+        factory    = RequestFactory()
+
+        self.assertEqual(middleware(factory.get('/reservations/list')).content, b'False')
+        self.assertEqual(middleware(factory.get('/users/signin')).content, b'False')
+        self.assertEqual(middleware(factory.get('/media/image.png')).content, b'True')
+
+    async def test_async_chain(self):
+        async def view(request):
+            return HttpResponse(str(hasattr(request, 'user')))
+        middleware = ProfileMiddleware(view)
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual((await middleware(RequestFactory().get('/users/check'))).content, b'False')
+        self.assertEqual((await middleware(RequestFactory().get('/'))).content, b'True')
+
+    def test_client_request_has_no_session(self):
+        response = Client().post('/users/email_check', '{}', content_type = 'application/json')
+
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
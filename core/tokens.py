@@ -0,0 +1,57 @@
+import hashlib, secrets, uuid
+
+from datetime import datetime, timedelta
+
+from users.models      import RefreshToken
+from core.functions    import jwt_generator
+from voicedoc.settings import REFRESH_TOKEN_DAYS
+
+from django.db import transaction
+
+class InvalidToken(Exception):
+    pass
+
+def digest(token): #원문은 저장하지 않고 해시로만 찾음
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def access_token(user):
+    return jwt_generator(user.id, name = user.name, is_doctor = user.is_doctor)
+
+def refresh_fields(user_id, family):
+    token = secrets.token_urlsafe(32)
+    return token, {
+        'user_id'    : user_id,
+        'family'     : family,
+        'token_hash' : digest(token),
+        'expires_at' : datetime.now() + timedelta(days = REFRESH_TOKEN_DAYS)
+    }
+
+async def aissue(user):
+    token, fields = refresh_fields(user.id, uuid.uuid4())
+    await RefreshToken.objects.acreate(**fields)
+    return {'token' : access_token(user), 'refresh_token' : token}
+
+def rotate(token):
+    with transaction.atomic():
+        row = RefreshToken.objects.select_for_update(of = ('self',)).select_related('user')\
+            .filter(token_hash = digest(token), expires_at__gt = datetime.now()).first()
+        if row is None:
+            raise InvalidToken('invalid refresh token')
+
+        reused = row.revoked
+        if reused: #이미 교체된 토큰이 다시 오면 탈취로 보고 같은 로그인의 토큰을 모두 폐기
+            RefreshToken.objects.filter(family = row.family).update(revoked = True)
+        else:
+            RefreshToken.objects.filter(id = row.id).update(revoked = True)
+            refresh, fields = refresh_fields(row.user_id, row.family)
+            RefreshToken.objects.create(**fields)
+
+    if reused:
+        raise InvalidToken('refresh token reused')
+    return {'token' : access_token(row.user), 'refresh_token' : refresh}
+
+def revoke(token):
+    family = RefreshToken.objects.filter(token_hash = digest(token)).values_list('family', flat = True).first()
+    if family is None:
+        raise InvalidToken('invalid refresh token')
+    RefreshToken.objects.filter(family = family).update(revoked = True)
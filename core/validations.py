@@ -1,14 +1,4 @@
 import re
 
-from django.core.exceptions import ValidationError
-
-regex_email    = '^[a-zA-Z0-9+-_.]+@[a-zA-Z0-9_-]+\.[a-zA-Z0-9-.]+$'
-regex_password = '^(?=.*[A-Za-z])(?=.*\d)[A-Za-z\d~!@#$%^&*()+|=]{8,}$'
-
-class Validation:
-    def email_validate(value):
-        if not re.match(regex_email,value):
-            raise ValidationError('not in email format')
-    def password_validate(value):
-        if not re.match(regex_password,value):
-            raise ValidationError('not in password format')
\ No newline at end of file
+regex_email    = re.compile(r'^[a-zA-Z0-9+-_.]+@[a-zA-Z0-9_-]+\.[a-zA-Z0-9-.]+$')
+regex_password = re.compile(r'^(?=.*[A-Za-z])(?=.*\d)[A-Za-z\d~!@#$%^&*()+|=]{8,}$')
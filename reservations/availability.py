@@ -0,0 +1,201 @@
+from collections import defaultdict
+from datetime    import date, datetime, time, timedelta
+
+from reservations.models   import Reservation, DoctorAvailability
+from reservations.statuses import status_registry
+from users.models          import DoctorDay, DoctorTime, DoctorScheduleRule, DoctorScheduleException, SLOT_MINUTES
+
+from django.db        import IntegrityError, transaction
+from django.db.models import Case, F, Q, When
+
+BOOKING_DAYS = 90 #이번 달 1일부터 오늘 + 90일까지만 비트맵을 저장하고 그 밖은 계산만 함
+
+def slot_index(value): #하루를 SLOT_MINUTES(30분) 단위 48칸의 비트맵으로 표현
+    minutes = value.hour * 60 + value.minute
+    if minutes % SLOT_MINUTES or value.second:
+        return None
+    return minutes // SLOT_MINUTES
+
+def slot_mask(value):
+    index = slot_index(value)
+    return 0 if index is None else 1 << index
+
+def bits_to_times(bits):
+    times = []
+    index = 0
+    while bits:
+        if bits & 1:
+            minutes = index * SLOT_MINUTES
+            times.append(time(minutes // 60, minutes % 60).strftime("%H:%M"))
+        bits  >>= 1
+        index  += 1
+    return times
+
+def month_range(year, month):
+    first = date(year, month, 1)
+    last  = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return first, last
+
+def working_dates(doctor_ids, first, last):
+    dates = set(DoctorDay.objects.filter(doctor_id__in = doctor_ids, date__range = (first, last))\
+            .values_list('doctor_id', 'date')) #규칙 도입 전에 날짜별로 넣어둔 근무일
+    rules = DoctorScheduleRule.objects.filter(doctor_id__in = doctor_ids, start_date__lte = last)\
+            .filter(Q(end_date__isnull = True) | Q(end_date__gte = first))\
+            .values_list('doctor_id', 'days', 'start_date', 'end_date')
+
+    for doctor_id, weekday, start_date, end_date in rules: #요청한 구간 안에서만 반복 규칙을 날짜로 펼침
+        day  = max(first, start_date)
+        day += timedelta(days = (weekday - day.weekday()) % 7)
+        stop = min(last, end_date) if end_date else last
+        while day <= stop:
+            dates.add((doctor_id, day))
+            day += timedelta(days = 7)
+
+    for doctor_id, day, is_working in DoctorScheduleException.objects\
+                                      .filter(doctor_id__in = doctor_ids, date__range = (first, last))\
+                                      .values_list('doctor_id', 'date', 'is_working'):
+        if is_working:
+            dates.add((doctor_id, day))
+        else:
+            dates.discard((doctor_id, day))
+    return dates
+
+def working_weekdays(doctor_id, year, month):
+    return sorted({day.weekday() for doctor_id, day in working_dates([doctor_id], *month_range(year, month))})
+
+def _booked(doctor_ids, first, last):
+    booked_bits = defaultdict(int)
+    for doctor_id, day, value in Reservation.objects.filter(doctor_id__in = doctor_ids, date__range = (first, last),
+                                                            status_id__in = status_registry.active_ids())\
+                                 .values_list('doctor_id', 'date', 'time'):
+        booked_bits[doctor_id, day] |= slot_mask(value)
+    return booked_bits
+
+def _build(doctor_id, day):
+    working_bits = 0
+
+    if working_dates([doctor_id], day, day): #하루짜리 구간이므로 결과가 있으면 근무일
+        working_times = DoctorTime.objects.filter(doctor_id = doctor_id, days = day.weekday())\
+                        .values_list('time', flat=True)
+        for value in working_times:
+            working_bits |= slot_mask(value)
+
+    try:
+        with transaction.atomic(): #행을 먼저 만든 뒤 예약을 읽어야 그 사이의 book()이 0행을 갱신하고 사라지지 않음
+            row = DoctorAvailability.objects.create(
+                doctor_id    = doctor_id,
+                date         = day,
+                working_bits = working_bits
+            )
+            if working_bits:
+                row.booked_bits = _booked([doctor_id], day, day)[doctor_id, day]
+                if row.booked_bits:
+                    DoctorAvailability.objects.filter(id = row.id).update(booked_bits = row.booked_bits)
+            return row
+    except IntegrityError: #동시에 다른 요청이 먼저 만든 경우
+        return DoctorAvailability.objects.get(doctor_id = doctor_id, date = day)
+
+def stored(day):
+    today = date.today()
+    return today.replace(day = 1) <= day <= today + timedelta(days = BOOKING_DAYS)
+
+def day_slots(doctor_id, day):
+    if not stored(day):
+        return _build_many([(doctor_id, day)], persist = False)[0]
+    try:
+        return DoctorAvailability.objects.get(doctor_id = doctor_id, date = day)
+    except DoctorAvailability.DoesNotExist:
+        return _build(doctor_id, day)
+
+def _fill_booked(rows, booked_bits):
+    booked_rows = [row for row in rows if row.working_bits and booked_bits[row.doctor_id, row.date]]
+    for row in booked_rows:
+        row.booked_bits = booked_bits[row.doctor_id, row.date]
+    return booked_rows
+
+def _build_many(missing, persist=True):
+    doctor_ids    = {doctor_id for doctor_id, day in missing}
+    first, last   = min(day for doctor_id, day in missing), max(day for doctor_id, day in missing)
+    working       = working_dates(doctor_ids, first, last)
+    weekday_bits  = defaultdict(int)
+
+    for doctor_id, weekday, value in DoctorTime.objects.filter(doctor_id__in = doctor_ids)\
+                                     .values_list('doctor_id', 'days', 'time'):
+        weekday_bits[doctor_id, weekday] |= slot_mask(value)
+
+    rows = [
+        DoctorAvailability(
+            doctor_id    = doctor_id,
+            date         = day,
+            working_bits = weekday_bits[doctor_id, day.weekday()] if (doctor_id, day) in working else 0
+        )
+        for doctor_id, day in missing
+    ]
+    if not persist:
+        _fill_booked(rows, _booked(doctor_ids, first, last))
+        return rows
+
+    with transaction.atomic(): #_build와 같은 이유로 행을 만든 뒤 예약을 읽어 한 번의 UPDATE로 채움
+        DoctorAvailability.objects.bulk_create(rows, ignore_conflicts = True) #동시에 만들어진 날짜는 그대로 둠
+        booked_rows = _fill_booked(rows, _booked(doctor_ids, first, last))
+        if booked_rows:
+            condition = Q()
+            for row in booked_rows:
+                condition |= Q(doctor_id = row.doctor_id, date = row.date)
+            DoctorAvailability.objects.filter(condition).update(booked_bits = Case(
+                *[When(doctor_id = row.doctor_id, date = row.date, then = row.booked_bits) for row in booked_rows]
+            ))
+    return rows
+
+def range_slots(doctor_ids, first, last):
+    days    = [first + timedelta(days = offset) for offset in range((last - first).days + 1)]
+    rows    = {
+        (row.doctor_id, row.date) : row
+        for row in DoctorAvailability.objects.filter(doctor_id__in = doctor_ids, date__range = (first, last))
+    }
+    missing = [(doctor_id, day) for day in days for doctor_id in doctor_ids if (doctor_id, day) not in rows]
+    for persist in (True, False): #비어 있는 의사/날짜만 한 번에 계산 (의사 수, 날짜 수와 관계없이 쿼리 수 고정)
+        keys = [key for key in missing if stored(key[1]) == persist]
+        if keys:
+            rows.update({(row.doctor_id, row.date) : row for row in _build_many(keys, persist)})
+    return [rows[key] for key in sorted(rows, key = lambda key: (key[1], key[0]))]
+
+def month_slots(doctor_id, year, month):
+    return range_slots([doctor_id], *month_range(year, month))
+
+def passed_mask(day, now):
+    if day < now.date():
+        return ~0
+    if day > now.date():
+        return 0
+    return (1 << ((now.hour * 60 + now.minute) // SLOT_MINUTES + 1)) - 1 #지금 시각 이전에 시작한 칸
+
+def earliest_slots(doctor_ids, first, last, limit):
+    now  = datetime.now()
+    free = [
+        (row.date, value, row.doctor_id)
+        for row in range_slots(doctor_ids, first, last)
+        for value in bits_to_times(row.working_bits & ~row.booked_bits & ~passed_mask(row.date, now))
+    ]
+    return sorted(free)[:limit]
+
+def book(doctor_id, day, value):
+    DoctorAvailability.objects.filter(doctor_id = doctor_id, date = day)\
+        .update(booked_bits = F('booked_bits').bitor(slot_mask(value)))
+
+def release(doctor_id, day, *values):
+    mask = 0
+    for value in values: #같은 날의 여러 시간을 한 번의 UPDATE로 비움
+        mask |= slot_mask(value)
+    DoctorAvailability.objects.filter(doctor_id = doctor_id, date = day)\
+        .update(booked_bits = F('booked_bits').bitand(~mask))
+
+def refresh(doctor_id, day):
+    DoctorAvailability.objects.filter(doctor_id = doctor_id, date = day)\
+        .update(booked_bits = _booked([doctor_id], day, day)[doctor_id, day])
+
+def invalidate(doctor_id, day=None):
+    rows = DoctorAvailability.objects.filter(doctor_id = doctor_id)
+    if day is not None:
+        rows = rows.filter(date = day)
+    rows.delete()
@@ -0,0 +1,109 @@
+import hashlib, logging, os, shutil, uuid
+
+from datetime import datetime, timedelta
+
+from core                import images
+from reservations.models import ImageIngestionJob, ReservationImage
+
+from django.conf       import settings
+from django.core.files import File
+from django.db         import transaction
+from django.db.models  import Q
+
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+def stage(upload):
+    os.makedirs(settings.IMAGE_STAGING_ROOT, exist_ok=True) #테스트에서 override_settings로 바꿀 수 있도록 호출 시점에 읽음
+    staged_path = os.path.join(settings.IMAGE_STAGING_ROOT, uuid.uuid4().hex)
+
+    if hasattr(upload, 'temporary_file_path'): #큰 파일은 이미 임시파일로 받아져 있으므로 이동만
+        shutil.move(upload.temporary_file_path(), staged_path)
+    else:
+        with open(staged_path, 'wb') as staged:
+            for chunk in upload.chunks(CHUNK_SIZE):
+                staged.write(chunk)
+    return staged_path, os.path.basename(upload.name)
+
+def discard(staged_files):
+    for staged_path, original_name in staged_files:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+
+def enqueue(reservation, staged_files):
+    ImageIngestionJob.objects.bulk_create([
+        ImageIngestionJob(
+            reservation   = reservation,
+            staged_path   = staged_path,
+            original_name = original_name
+        )
+        for staged_path, original_name in staged_files
+    ])
+
+def checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as staged:
+        for chunk in iter(lambda: staged.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def claim(job_id):
+    return ImageIngestionJob.objects.filter(id = job_id, state = ImageIngestionJob.State.PENDING)\
+           .update(state = ImageIngestionJob.State.PROCESSING, updated_at = datetime.now()) == 1 #다른 워커가 먼저 가져간 작업은 건너뜀
+
+def fail(job, error):
+    attempts = job.attempts + 1
+    if attempts < settings.IMAGE_INGESTION_MAX_ATTEMPTS:
+        state    = ImageIngestionJob.State.PENDING
+        retry_at = datetime.now() + timedelta(seconds = settings.IMAGE_INGESTION_RETRY_SECONDS * 2 ** (attempts - 1))
+    else: #더 이상 재시도하지 않으므로 스테이징 파일도 정리
+        state    = ImageIngestionJob.State.FAILED
+        retry_at = None
+        discard([(job.staged_path, job.original_name)])
+    ImageIngestionJob.objects.filter(id = job.id, state = ImageIngestionJob.State.PROCESSING).update(
+        state      = state,
+        attempts   = attempts,
+        retry_at   = retry_at,
+        error      = str(error)[:1000],
+        updated_at = datetime.now()
+    )
+
+def reclaim_stale(limit):
+    stale_before = datetime.now() - timedelta(seconds = settings.IMAGE_INGESTION_STALE_SECONDS)
+    stale_jobs   = ImageIngestionJob.objects.filter(state = ImageIngestionJob.State.PROCESSING, updated_at__lt = stale_before)\
+                   .order_by('id')[:limit]
+    for job in stale_jobs: #처리 중에 워커가 죽은 작업도 실패 한 번으로 세어 재시도
+        fail(job, 'worker timed out')
+
+def finalize(job):
+    with open(job.staged_path, 'rb') as staged, transaction.atomic():
+        image = ReservationImage(reservation_id = job.reservation_id, checksum = checksum(job.staged_path))
+        image.image.save(job.original_name, File(staged), save = False)
+        image.save()
+        ImageIngestionJob.objects.filter(id = job.id).update(state = ImageIngestionJob.State.DONE)
+    os.remove(job.staged_path)
+    try:
+        for size in settings.IMAGE_VARIANT_SIZES: #썸네일은 워커에서 미리 만들어 둠
+            images.variant(image.image.name, size)
+    except Exception: #DecompressionBombError 등 디코딩 오류가 나도 원본은 저장됐으므로 작업은 DONE으로 두고 워커는 계속 진행
+        logger.exception('image variants failed for %s', image.image.name)
+    return image
+
+def process_pending(limit=100):
+    reclaim_stale(limit)
+    processed = 0
+    job_ids   = ImageIngestionJob.objects.filter(state = ImageIngestionJob.State.PENDING)\
+                .filter(Q(retry_at__isnull = True) | Q(retry_at__lte = datetime.now()))\
+                .order_by('id').values_list('id', flat=True)[:limit]
+
+    for job_id in list(job_ids):
+        if not claim(job_id):
+            continue
+        job = ImageIngestionJob.objects.get(id = job_id)
+        try:
+            finalize(job)
+            processed += 1
+        except (OSError, ValueError) as e:
+            fail(job, e)
+    return processed
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from reservations.models   import Reservation, ReservationListEntry
+from reservations.statuses import status_registry
+from users.models          import Doctor
+
+from django.db        import transaction
+from django.db.models import F
+
+DOCTOR_FIELDS = {
+    'doctor_name'          : F('user__name'),
+    'hospital_name'        : F('hospital__name'),
+    'subject_name'         : F('subject__name'),
+    'doctor_profile_image' : F('profile_image'),
+}
+
+def build(reservation_ids, now):
+    rows = Reservation.objects.filter(id__in = reservation_ids).values(
+        'id', 'user_id', 'doctor_id', 'status_id', 'date', 'time',
+        **{name : F(f'doctor__{field.name}') for name, field in DOCTOR_FIELDS.items()}
+    )
+    return [
+        ReservationListEntry(
+            reservation_id       = row['id'],
+            user_id              = row['user_id'],
+            doctor_id            = row['doctor_id'],
+            status_id            = row['status_id'],
+            status_name          = status_registry.name(row['status_id']),
+            doctor_name          = row['doctor_name'],
+            hospital_name        = row['hospital_name'] or '', #병원/과목이 삭제된 의사
+            subject_name         = row['subject_name'] or '',
+            doctor_profile_image = row['doctor_profile_image'],
+            date                 = row['date'],
+            time                 = row['time'],
+            updated_at           = now
+        )
+        for row in rows
+    ]
+
+def sync(reservation_ids):
+    reservation_ids = list(reservation_ids)
+    with transaction.atomic(): #조인은 쓰기 시점에 한 번만, 목록 조회는 이 테이블만 읽음
+        ReservationListEntry.objects.filter(reservation_id__in = reservation_ids).delete()
+        ReservationListEntry.objects.bulk_create(build(reservation_ids, datetime.now()))
+
+def update_doctor(doctor_id):
+    doctor = Doctor.objects.filter(id = doctor_id).values(**DOCTOR_FIELDS).first()
+    if doctor is None:
+        return
+    doctor['hospital_name'] = doctor['hospital_name'] or ''
+    doctor['subject_name']  = doctor['subject_name'] or ''
+    update_entries({'doctor_id' : doctor_id}, **doctor)
+
+def update_entries(lookup, **values): #이름 변경 등은 조인 없이 해당 행의 컬럼만 갱신
+    ReservationListEntry.objects.filter(**lookup).update(updated_at = datetime.now(), **values)
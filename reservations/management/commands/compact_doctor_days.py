@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from users.models import DoctorDay, DoctorScheduleRule
+
+class Command(BaseCommand):
+    help = 'delete DoctorDay rows that are already covered by a weekly DoctorScheduleRule. '\
+           'The rows are deleted permanently : if the rule is later shortened or removed, those dates are not restored '\
+           'and have to be added back as DoctorScheduleException(is_working=True)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='only count the rows that would be deleted')
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for rule in DoctorScheduleRule.objects.all():
+            days = DoctorDay.objects.filter(
+                doctor_id          = rule.doctor_id,
+                date__gte          = rule.start_date,
+                date__iso_week_day = rule.days + 1 #iso_week_day는 월요일이 1
+            )
+            if rule.end_date:
+                days = days.filter(date__lte = rule.end_date)
+            if options['dry_run']:
+                deleted += days.count()
+            else: #규칙이 같은 날짜를 만들어 주므로 근무일은 그대로, 지운 행은 되살릴 수 없으므로 --dry-run으로 먼저 확인
+                deleted += days.delete()[0]
+        self.stdout.write(f'{"would delete" if options["dry_run"] else "deleted"} {deleted} doctor days')
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reservations import ingestion
+
+class Command(BaseCommand):
+    help = 'finalize staged reservation images into ReservationImage rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='process pending jobs once and exit')
+        parser.add_argument('--batch', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0, help='seconds to wait when queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = ingestion.process_pending(options['batch'])
+            if processed:
+                self.stdout.write(f'processed {processed} images')
+            if options['once']:
+                break
+            if processed < options['batch']:
+                time.sleep(options['interval'])
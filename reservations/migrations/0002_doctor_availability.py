@@ -0,0 +1,32 @@
+# Generated by Django 4.0.4 on 2026-10-18 16:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('reservations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='YYYY-MM-DD')),
+                ('working_bits', models.BigIntegerField(default=0)),
+                ('booked_bits', models.BigIntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to='users.doctor')),
+            ],
+            options={
+                'db_table': 'doctor_availabilities',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='doctoravailability',
+            constraint=models.UniqueConstraint(fields=('doctor', 'date'), name='doctor_availabilities_doctor_date_uniq'),
+        ),
+    ]
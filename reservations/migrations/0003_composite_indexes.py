@@ -0,0 +1,21 @@
+# Generated by Django 4.0.4 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0002_doctor_availability'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['doctor', 'date', 'time', 'status'], name='reservations_doctor_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date', 'time'], name='reservations_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.0.4 on 2026-10-18 16:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def claim_active_slots(apps, schema_editor):
+    Reservation     = apps.get_model('reservations', 'Reservation')
+    ReservationSlot = apps.get_model('reservations', 'ReservationSlot')
+
+    claimed = set()
+    slots   = []
+    reservations = Reservation.objects.exclude(status__name='진료취소')\
+                   .values_list('id', 'doctor_id', 'date', 'time').order_by('id')
+    for reservation_id, doctor_id, date, time in reservations.iterator():
+        if (doctor_id, date, time) in claimed: #이미 중복된 예약은 먼저 생성된 예약이 슬롯을 가짐
+            continue
+        claimed.add((doctor_id, date, time))
+        slots.append(ReservationSlot(
+            reservation_id = reservation_id,
+            doctor_id      = doctor_id,
+            date           = date,
+            time           = time
+        ))
+    ReservationSlot.objects.bulk_create(slots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('reservations', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='YYYY-MM-DD')),
+                ('time', models.TimeField()),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.doctor')),
+                ('reservation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='slot', to='reservations.reservation')),
+            ],
+            options={
+                'db_table': 'reservation_slots',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reservationslot',
+            constraint=models.UniqueConstraint(fields=('doctor', 'date', 'time'), name='reservation_slots_doctor_slot_uniq'),
+        ),
+        migrations.RunPython(claim_active_slots, migrations.RunPython.noop),
+    ]
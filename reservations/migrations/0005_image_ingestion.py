@@ -0,0 +1,40 @@
+# Generated by Django 4.0.4 on 2026-10-18 16:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_reservation_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservationimage',
+            name='checksum',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name='ImageIngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('staged_path', models.CharField(max_length=255)),
+                ('original_name', models.CharField(max_length=255)),
+                ('state', models.IntegerField(choices=[(0, 'Pending'), (1, 'Processing'), (2, 'Done'), (3, 'Failed')], default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.CharField(max_length=1000, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reservations.reservation')),
+            ],
+            options={
+                'db_table': 'image_ingestion_jobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imageingestionjob',
+            index=models.Index(fields=['state', 'id'], name='image_jobs_state_idx'),
+        ),
+    ]
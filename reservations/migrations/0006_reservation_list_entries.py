@@ -0,0 +1,72 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:09
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_list_entries(apps, schema_editor):
+    Reservation          = apps.get_model('reservations', 'Reservation')
+    ReservationListEntry = apps.get_model('reservations', 'ReservationListEntry')
+
+    now  = datetime.now()
+    rows = Reservation.objects.values(
+        'id', 'user_id', 'doctor_id', 'status_id', 'date', 'time', 'status__name', 'doctor__user__name',
+        'doctor__hospital__name', 'doctor__subject__name', 'doctor__profile_image'
+    ).order_by('id')
+    ReservationListEntry.objects.bulk_create((
+        ReservationListEntry(
+            reservation_id       = row['id'],
+            user_id              = row['user_id'],
+            doctor_id            = row['doctor_id'],
+            status_id            = row['status_id'],
+            status_name          = row['status__name'],
+            doctor_name          = row['doctor__user__name'],
+            hospital_name        = row['doctor__hospital__name'] or '',
+            subject_name         = row['doctor__subject__name'] or '',
+            doctor_profile_image = row['doctor__profile_image'],
+            date                 = row['date'],
+            time                 = row['time'],
+            updated_at           = now
+        )
+        for row in rows.iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_initial'),
+        ('reservations', '0005_image_ingestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationListEntry',
+            fields=[
+                ('reservation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='list_entry', serialize=False, to='reservations.reservation')),
+                ('status_name', models.CharField(max_length=10)),
+                ('doctor_name', models.CharField(max_length=100)),
+                ('hospital_name', models.CharField(max_length=30)),
+                ('subject_name', models.CharField(max_length=30)),
+                ('doctor_profile_image', models.CharField(max_length=100)),
+                ('date', models.DateField(help_text='YYYY-MM-DD')),
+                ('time', models.TimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.doctor')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reservations.status')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reservation_list_entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reservationlistentry',
+            index=models.Index(fields=['user', 'date', 'time', 'reservation'], name='list_entries_user_date_idx'),
+        ),
+        migrations.RunPython(build_list_entries, migrations.RunPython.noop),
+    ]
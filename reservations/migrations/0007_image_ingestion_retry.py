@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_reservation_list_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageingestionjob',
+            name='retry_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -13,6 +13,22 @@ class Reservation(models.Model):
 
     class Meta:
         db_table = 'reservations'
+        indexes  = [
+            models.Index(fields=['doctor', 'date', 'time', 'status'], name='reservations_doctor_slot_idx'),
+            models.Index(fields=['user', 'date', 'time'], name='reservations_user_date_idx'),
+        ]
+
+class ReservationSlot(models.Model):
+    reservation = models.OneToOneField('reservations.Reservation', on_delete=models.CASCADE, related_name='slot')
+    doctor      = models.ForeignKey('users.Doctor', on_delete=models.CASCADE)
+    date        = models.DateField(help_text="YYYY-MM-DD")
+    time        = models.TimeField()
+
+    class Meta:
+        db_table    = 'reservation_slots'
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'date', 'time'], name='reservation_slots_doctor_slot_uniq'),
+        ]
 
 class Status(models.Model):
     name = models.CharField(max_length=10)
@@ -23,6 +39,64 @@ class Status(models.Model):
 class ReservationImage(models.Model):
     reservation = models.ForeignKey('reservations.Reservation', on_delete=models.CASCADE)
     image       = models.FileField(upload_to="reservation_images")
+    checksum    = models.CharField(max_length=64, null=True)
+
+    class Meta:
+        db_table = 'reservation_images'
+
+class DoctorAvailability(models.Model):
+    doctor       = models.ForeignKey('users.Doctor', on_delete=models.CASCADE, related_name='availability')
+    date         = models.DateField(help_text="YYYY-MM-DD")
+    working_bits = models.BigIntegerField(default=0)
+    booked_bits  = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table    = 'doctor_availabilities'
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'date'], name='doctor_availabilities_doctor_date_uniq'),
+        ]
+
+
+class ImageIngestionJob(models.Model):
+    class State(models.IntegerChoices):
+        PENDING    = 0
+        PROCESSING = 1
+        DONE       = 2
+        FAILED     = 3
+
+    reservation   = models.ForeignKey('reservations.Reservation', on_delete=models.CASCADE)
+    staged_path   = models.CharField(max_length=255)
+    original_name = models.CharField(max_length=255)
+    state         = models.IntegerField(choices=State.choices, default=State.PENDING)
+    attempts      = models.IntegerField(default=0)
+    retry_at      = models.DateTimeField(null=True) #실패 후 다시 가져갈 수 있는 시각
+    error         = models.CharField(max_length=1000, null=True)
+    created_at    = models.DateTimeField(auto_now_add=True)
+    updated_at    = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'image_ingestion_jobs'
+        indexes  = [
+            models.Index(fields=['state', 'id'], name='image_jobs_state_idx'),
+        ]
+
+class ReservationListEntry(models.Model):
+    reservation          = models.OneToOneField('reservations.Reservation', on_delete=models.CASCADE,
+                                                primary_key=True, related_name='list_entry')
+    user                 = models.ForeignKey('users.User', on_delete=models.CASCADE, db_index=False)
+    doctor               = models.ForeignKey('users.Doctor', on_delete=models.CASCADE)
+    status               = models.ForeignKey('reservations.Status', on_delete=models.CASCADE)
+    status_name          = models.CharField(max_length=10)
+    doctor_name          = models.CharField(max_length=100)
+    hospital_name        = models.CharField(max_length=30)
+    subject_name         = models.CharField(max_length=30)
+    doctor_profile_image = models.CharField(max_length=100)
+    date                 = models.DateField(help_text="YYYY-MM-DD")
+    time                 = models.TimeField()
+    updated_at           = models.DateTimeField()
 
     class Meta:
-        db_table = 'reservation_images'
\ No newline at end of file
+        db_table = 'reservation_list_entries'
+        indexes  = [
+            models.Index(fields=['user', 'date', 'time', 'reservation'], name='list_entries_user_date_idx'),
+        ]
@@ -0,0 +1,27 @@
+from core import events
+
+def doctor_channel(doctor_id):
+    return f'doctor:{doctor_id}'
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+def slot_booked(doctor_id, day, value):
+    events.publish(doctor_channel(doctor_id), 'slot-booked', {
+        'doctor_id' : int(doctor_id),
+        'date'      : day.strftime("%Y-%m-%d"),
+        'time'      : value.strftime("%H:%M")
+    })
+
+def slot_freed(doctor_id, day, value):
+    events.publish(doctor_channel(doctor_id), 'slot-freed', {
+        'doctor_id' : int(doctor_id),
+        'date'      : day.strftime("%Y-%m-%d"),
+        'time'      : value.strftime("%H:%M")
+    })
+
+def status_changed(user_id, reservation_id, status):
+    events.publish(user_channel(user_id), 'status-changed', {
+        'reservation_id' : reservation_id,
+        'status'         : status
+    })
@@ -0,0 +1,125 @@
+from core                    import images
+from core.cache              import bump_version
+from reservations            import availability, listing
+from reservations.models     import Reservation, Status
+from reservations.statuses   import status_registry
+from users.models            import User, Doctor, DoctorDay, DoctorTime, DoctorScheduleRule, DoctorScheduleException,\
+                                    Hospital, Subject
+from voicedoc.settings       import IMAGE_VARIANT_SIZES
+
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete
+from django.dispatch          import receiver
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, created, **kwargs):
+    day = sender._meta.get_field('date').to_python(instance.date) #문자열로 저장된 경우 대비
+    if created and instance.status_id in status_registry.active_ids():
+        availability.book(instance.doctor_id, day, sender._meta.get_field('time').to_python(instance.time))
+    elif not created:
+        availability.refresh(instance.doctor_id, day)
+
+@receiver(post_save, sender=Reservation)
+def reservation_list_entry_saved(sender, instance, **kwargs):
+    listing.sync([instance.id])
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    availability.refresh(instance.doctor_id, instance.date)
+
+@receiver(post_save, sender=DoctorDay)
+def doctor_day_saved(sender, instance, created, **kwargs):
+    availability.invalidate(instance.doctor_id, instance.date if created else None)
+    bump_version(f'schedule:{instance.doctor_id}')
+
+@receiver(post_delete, sender=DoctorDay)
+def doctor_day_deleted(sender, instance, **kwargs):
+    availability.invalidate(instance.doctor_id, instance.date)
+    bump_version(f'schedule:{instance.doctor_id}')
+
+@receiver([post_save, post_delete], sender=DoctorTime)
+def doctor_time_changed(sender, instance, **kwargs):
+    availability.invalidate(instance.doctor_id)
+    bump_version(f'schedule:{instance.doctor_id}')
+
+@receiver([post_save, post_delete], sender=DoctorScheduleRule)
+def schedule_rule_changed(sender, instance, **kwargs):
+    availability.invalidate(instance.doctor_id) #규칙 한 줄만 바뀌므로 캐시된 날짜만 지우면 됨
+    bump_version(f'schedule:{instance.doctor_id}')
+
+@receiver([post_save, post_delete], sender=DoctorScheduleException)
+def schedule_exception_changed(sender, instance, **kwargs):
+    availability.invalidate(instance.doctor_id, instance.date)
+    bump_version(f'schedule:{instance.doctor_id}')
+
+IMAGE_FIELDS = {Subject : 'image', Doctor : 'profile_image'}
+
+@receiver(post_init, sender=Subject)
+@receiver(post_init, sender=Doctor)
+def image_name_loaded(sender, instance, **kwargs): #저장 시 이미지가 바뀌었는지 비교할 이름, 지연 로딩된 필드는 읽지 않음
+    value = instance.__dict__.get(IMAGE_FIELDS[sender])
+    instance._loaded_image = getattr(value, 'name', value)
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Doctor)
+def image_variants_generated(sender, instance, created, update_fields, **kwargs): #목록 캐시 버전을 올리기 전에 업로드 시점에 썸네일을 만듦
+    field = IMAGE_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    name = getattr(instance, field).name
+    if not created and name == instance._loaded_image: #병원 변경 등 이미지가 그대로인 저장은 다시 인코딩하지 않음
+        return
+    instance._loaded_image = name
+    for size in IMAGE_VARIANT_SIZES:
+        images.variant(name, size)
+
+@receiver([post_save, post_delete], sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    bump_version('subjects')
+    bump_version('doctors')
+
+@receiver([post_save, post_delete], sender=Doctor)
+@receiver([post_save, post_delete], sender=Hospital)
+def doctor_changed(sender, instance, **kwargs):
+    bump_version('doctors')
+
+@receiver([post_save, post_delete], sender=User)
+def doctor_user_changed(sender, instance, **kwargs):
+    if instance.is_doctor: #의사 이름이 목록에 노출됨
+        bump_version('doctors')
+
+@receiver(post_save, sender=Doctor)
+def doctor_list_entries_changed(sender, instance, created, **kwargs):
+    if not created: #새 의사는 아직 예약이 없음
+        listing.update_doctor(instance.id)
+
+@receiver(post_save, sender=Hospital)
+def hospital_list_entries_changed(sender, instance, created, **kwargs):
+    if not created:
+        listing.update_entries({'doctor__hospital_id' : instance.id}, hospital_name = instance.name)
+
+@receiver(post_save, sender=Subject)
+def subject_list_entries_changed(sender, instance, created, **kwargs):
+    if not created:
+        listing.update_entries({'doctor__subject_id' : instance.id}, subject_name = instance.name)
+
+@receiver(pre_delete, sender=Hospital)
+def hospital_list_entries_deleted(sender, instance, **kwargs):
+    listing.update_entries({'doctor__hospital_id' : instance.id}, hospital_name = '') #삭제 후에는 SET_NULL로 찾을 수 없음
+
+@receiver(pre_delete, sender=Subject)
+def subject_list_entries_deleted(sender, instance, **kwargs):
+    listing.update_entries({'doctor__subject_id' : instance.id}, subject_name = '')
+
+@receiver([post_save, post_delete], sender=Status)
+def status_changed(sender, instance, **kwargs):
+    status_registry.clear()
+
+@receiver(post_save, sender=Status)
+def status_list_entries_changed(sender, instance, created, **kwargs):
+    if not created:
+        listing.update_entries({'status_id' : instance.id}, status_name = instance.name)
+
+@receiver(post_save, sender=User)
+def doctor_user_list_entries_changed(sender, instance, created, **kwargs):
+    if instance.is_doctor and not created:
+        listing.update_entries({'doctor__user_id' : instance.id}, doctor_name = instance.name)
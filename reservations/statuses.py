@@ -0,0 +1,75 @@
+import threading
+
+from reservations.models import Status
+
+WAITING  = '진료대기'
+DONE     = '진료완료'
+CANCELED = '진료취소'
+ENDED    = (DONE, CANCELED) #더 이상 취소할 수 없는 상태
+
+class StatusRegistry:
+    def __init__(self):
+        self.ids  = None
+        self.lock = threading.Lock()
+
+    def store(self, ids):
+        with self.lock:
+            self.ids = ids or None #statuses를 넣기 전에 읽은 빈 결과는 캐시하지 않음
+        return ids
+
+    def load(self):
+        return self.store(dict(Status.objects.values_list('name', 'id')))
+
+    async def aload(self):
+        return self.store({name : status_id async for name, status_id in Status.objects.values_list('name', 'id')})
+
+    def names(self):
+        ids = self.ids
+        if ids is None: #statuses 테이블은 거의 바뀌지 않으므로 프로세스당 한 번만 읽음
+            ids = self.load()
+        return ids
+
+    async def anames(self):
+        ids = self.ids
+        if ids is None:
+            ids = await self.aload()
+        return ids
+
+    def lookup(self, ids, name):
+        try:
+            return ids[name]
+        except KeyError:
+            raise Status.DoesNotExist(f'status {name} not exists')
+
+    def id(self, name):
+        ids = self.names()
+        if name not in ids: #캐시한 뒤에 추가된 상태일 수 있으므로 한 번 다시 읽음
+            ids = self.load()
+        return self.lookup(ids, name)
+
+    async def aid(self, name):
+        ids = await self.anames()
+        if name not in ids:
+            ids = await self.aload()
+        return self.lookup(ids, name)
+
+    def name(self, status_id):
+        ids = self.names()
+        if status_id not in ids.values():
+            ids = self.load()
+        return next((name for name, value in ids.items() if value == status_id), None)
+
+    async def aname(self, status_id):
+        ids = await self.anames()
+        if status_id not in ids.values():
+            ids = await self.aload()
+        return next((name for name, value in ids.items() if value == status_id), None)
+
+    def active_ids(self): #취소된 예약은 빈 시간으로 취급
+        return tuple(status_id for name, status_id in self.names().items() if name != CANCELED)
+
+    def clear(self):
+        with self.lock:
+            self.ids = None
+
+status_registry = StatusRegistry()
@@ -1,15 +1,38 @@
-from datetime import date, datetime
-
-from users.models        import Subject, Doctor, User, Hospital, DoctorDay, DoctorTime
-from reservations.models import Reservation, ReservationImage, Status
-from voicedoc.settings   import IP_ADDRESS
+import hashlib, os, re, tempfile
+
+from io       import StringIO
+from unittest import skipIf
+from datetime import date, datetime, time, timedelta
+
+from reservations        import availability, ingestion, listing, statuses
+from users.models        import Subject, Doctor, User, Hospital, DoctorDay, DoctorTime, DoctorScheduleRule, DoctorScheduleException
+from reservations.models import Reservation, ReservationImage, ReservationSlot, Status, DoctorAvailability, ImageIngestionJob,\
+                                ReservationListEntry
+from voicedoc.settings   import IP_ADDRESS, IMAGE_VARIANT_SIZES
+from core                import images, events
 from core.functions      import jwt_generator, convertor
+from core.authentication import user_cache
+from reservations.statuses import status_registry
+from reservations.views    import ReservationView
 
-from django.test import TestCase, TransactionTestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, AsyncClient, override_settings
+from django.test.utils          import CaptureQueriesContext
+from django.db                  import connection
 from django.db.models.functions import Concat
 from django.db.models           import CharField, Value, Q
 from django.core.files          import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage  import default_storage
+from django.core.cache          import cache
 from django.core.paginator      import Paginator
+from django.core.management     import call_command
+from django.core.exceptions     import ValidationError
+
+class ClearCachesMixin: #프로세스 전역 캐시가 앞선 테스트의 id를 들고 있지 않도록 매 테스트 전에 비움
+    def setUp(self):
+        user_cache.clear()
+        status_registry.clear()
+        cache.clear()
 
 class SubjectAndDoctorLoadTest(TestCase):
     def setUp(self):
@@ -93,8 +116,9 @@ class SubjectAndDoctorLoadTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"result" : result})
 
-class DateAndTimeLoadTest(TestCase):
+class DateAndTimeLoadTest(ClearCachesMixin, TestCase):
     def setUp(self):
+        super().setUp()
         testday   = datetime.now()
         year      = testday.year
         month     = testday.month
@@ -267,8 +291,58 @@ class DateAndTimeLoadTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'message' : f'not work on {full_date}'})
 
-class ReservationDetailAndCancelTest(TestCase):
+    def test_month_calendar_loading_success(self):
+        client    = Client()
+        user      = User.objects.get(name='환자1')
+        token     = jwt_generator(user.id)
+        header    = {'HTTP_Authorization' : token}
+
+        doc       = User.objects.get(name='의사1')
+        doctor    = Doctor.objects.get(user_id = doc.id)
+        testday   = datetime.now()
+        year      = testday.year
+        month     = testday.month
+        full_date = date(year, month, testday.day)
+
+        response  = client.get(f'/reservations/time/{doctor.id}?year={year}&month={month}&view=month', **header)
+        result    = {row['date'] : row for row in response.json()['result']}
+        first, last = availability.month_range(year, month)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(result), last.day)
+        self.assertEqual(result[full_date.strftime("%Y-%m-%d")], {
+            'date'          : full_date.strftime("%Y-%m-%d"),
+            'working_times' : ['10:00', '11:00', '12:00', '13:00'],
+            'expired_times' : ['12:00', '13:00']
+        })
+        self.assertEqual(sum(len(row['working_times']) for row in result.values()), 4)
+
+    def test_month_calendar_bounds(self):
+        client  = Client()
+        header  = {'HTTP_Authorization' : jwt_generator(User.objects.get(name='환자1').id)}
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        today   = datetime.now().date()
+        past    = today.replace(day = 1) - timedelta(days = 1)
+        url     = '/reservations/time/{}?year={}&month={}&view=month'
+
+        response = client.get(url.format(doctor.id, past.year, past.month), **header)
+        self.assertEqual(response.json(), {'message' : "you can't read old calaneder"})
+
+        response = client.get(url.format(doctor.id, today.year + 1, today.month), **header)
+        self.assertEqual(response.json(), {'message' : 'calendar range limit is 12 months'})
+
+        response = client.get(url.format(doctor.id + 100, today.year, today.month), **header)
+        self.assertEqual(response.json(), {'message' : 'doctor not exists'})
+        self.assertFalse(DoctorAvailability.objects.filter(doctor_id = doctor.id + 100).exists())
+
+        far = date(today.year + 1, today.month, 1) - timedelta(days = 1) #예약 기간 밖의 달은 저장하지 않고 계산만
+        response = client.get(url.format(doctor.id, far.year, far.month), **header)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(DoctorAvailability.objects.filter(date__gt = today + timedelta(days = availability.BOOKING_DAYS)).exists())
+
+class ReservationDetailAndCancelTest(ClearCachesMixin, TestCase):
     def setUp(self):
+        super().setUp()
         testday   = datetime.now()
         year      = testday.year
         month     = testday.month
@@ -449,8 +523,11 @@ class ReservationDetailAndCancelTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'message' : 'already ended or canceled'})
 
-class ReservationCreateTest(TransactionTestCase):
+class ReservationCreateTest(ClearCachesMixin, TransactionTestCase):
     def setUp(self):
+        super().setUp()
+        staging   = self.enterContext(tempfile.TemporaryDirectory()) #스테이징 파일이 저장소 안에 남지 않도록
+        self.enterContext(override_settings(IMAGE_STAGING_ROOT = staging))
         testday   = datetime.now()
         year      = testday.year
         month     = testday.month
@@ -763,8 +840,56 @@ class ReservationCreateTest(TransactionTestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'message' : 'not allowed to make reservation to old date'})
 
-class ReservationlistTest(TransactionTestCase):
+    def test_create_fail_slot_claimed(self):
+        client      = Client()
+        user        = User.objects.get(name='환자1')
+        token       = jwt_generator(user.id)
+        header      = {'HTTP_Authorization' : token}
+        doc_user    = User.objects.get(name = '의사1')
+        doc         = Doctor.objects.get(user_id = doc_user.id)
+        testday     = datetime.now()
+        form        = {'doctor_id':doc.id,
+                        'year':f'{testday.year}',
+                        'month':f'{testday.month}',
+                        'date':f'{testday.day}',
+                        'time':'11:00',
+                        'symptom':'asdf'}
+        response    = client.post(f'/reservations', form, **header)
+        self.assertEqual(response.status_code, 201)
+
+        DoctorAvailability.objects.all().update(booked_bits = 0) #비트맵이 늦게 반영된 상황에서도 슬롯 제약으로 막히는지
+        response    = client.post(f'/reservations', form, **header)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'that time already reserved'})
+        self.assertEqual(Reservation.objects.filter(doctor_id = doc.id, time = '11:00').count(), 1)
+
+    def test_cancel_releases_slot(self):
+        client      = Client()
+        user        = User.objects.get(name='환자1')
+        token       = jwt_generator(user.id)
+        header      = {'HTTP_Authorization' : token}
+        doc_user    = User.objects.get(name = '의사1')
+        doc         = Doctor.objects.get(user_id = doc_user.id)
+        testday     = datetime.now()
+        form        = {'doctor_id':doc.id,
+                        'year':f'{testday.year}',
+                        'month':f'{testday.month}',
+                        'date':f'{testday.day}',
+                        'time':'11:00',
+                        'symptom':'asdf'}
+        client.post(f'/reservations', form, **header)
+        reservation = Reservation.objects.get(doctor_id = doc.id, time = '11:00')
+        client.patch(f'/reservations?res_id={reservation.id}&work=cancel', **header)
+        response    = client.post(f'/reservations', form, **header)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ReservationSlot.objects.get(doctor_id = doc.id, time = '11:00').reservation_id,
+                         Reservation.objects.exclude(id = reservation.id).get(doctor_id = doc.id, time = '11:00').id)
+
+class ReservationlistTest(ClearCachesMixin, TransactionTestCase):
     def setUp(self):
+        super().setUp()
         testday   = datetime.now()
         year      = testday.year
         month     = testday.month
@@ -859,6 +984,7 @@ class ReservationlistTest(TransactionTestCase):
                         status_id = canceled.id,
                         user_id = User.objects.get(name='환자1').id),
         ])
+        listing.sync(Reservation.objects.values_list('id', flat = True)) #bulk_create는 signal을 보내지 않음
 
         ReservationImage.objects.bulk_create([
             ReservationImage(
@@ -910,3 +1036,965 @@ class ReservationlistTest(TransactionTestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'result' : result})
+
+    def test_list_entries_follow_changes(self):
+        client   = Client()
+        user     = User.objects.get(name='환자1')
+        header   = {'HTTP_Authorization' : jwt_generator(user.id)}
+        hospital = Hospital.objects.get(name = '병원1')
+        waiting  = Reservation.objects.get(symtom = 'ended')
+
+        hospital.name = '병원2'
+        hospital.save()
+        client.patch(f'/reservations?res_id={waiting.id}&work=cancel', **header)
+
+        with self.assertNumQueries(3): #사용자 + 페이지 COUNT + 목록
+            response = client.get('/reservations/list?page=1&limit=5', **header)
+
+        result = {row['reservation_id'] : row for row in response.json()['result']}
+        self.assertEqual({row['hospital_name'] for row in result.values()}, {'병원2'})
+        self.assertEqual(result[str(waiting.id)]['status_name'], '진료취소')
+        self.assertEqual(ReservationListEntry.objects.count(), Reservation.objects.count())
+
+class AvailabilityTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        testday   = datetime.now()
+        full_date = date(testday.year, testday.month, testday.day)
+
+        User.objects.bulk_create([
+            User(name = '환자1', 
+                 email = 'patient1@gmail.com',
+                 password = '1q2w3e4r',
+                 is_doctor = False),
+            User(name = '의사1', 
+                 email = 'doctor1@gmail.com',
+                 password = '1q2w3e4r',
+                 is_doctor = True)
+        ])
+
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        doctor   = Doctor.objects.create(
+            user_id = User.objects.get(name = '의사1').id,
+            profile_image = 'image',
+            hospital_id = hospital.id,
+            subject_id = subject.id,
+        )
+
+        DoctorDay.objects.create(date = full_date, doctor_id = doctor.id)
+        DoctorTime.objects.bulk_create([
+            DoctorTime(days = testday.weekday(), time = '10:00', doctor_id = doctor.id),
+            DoctorTime(days = testday.weekday(), time = '10:30', doctor_id = doctor.id),
+            DoctorTime(days = testday.weekday(), time = '11:00', doctor_id = doctor.id),
+        ])
+
+        Status.objects.bulk_create([
+            Status(name = '진료대기'),
+            Status(name = '진료완료'),
+            Status(name = '진료취소')
+        ])
+
+    def test_bits_to_times(self):
+        bits = availability.slot_mask(time(10, 0)) | availability.slot_mask(time(13, 30))
+
+        self.assertEqual(availability.bits_to_times(bits), ['10:00', '13:30'])
+        self.assertEqual(availability.slot_mask(time(10, 15)), 0)
+
+    def test_passed_slots_masked_today(self):
+        now  = datetime(2030, 1, 1, 10, 0)
+        bits = availability.slot_mask(time(9, 30)) | availability.slot_mask(time(10, 0)) | availability.slot_mask(time(10, 30))
+
+        self.assertEqual(availability.bits_to_times(bits & ~availability.passed_mask(now.date(), now)), ['10:30'])
+        self.assertEqual(bits & ~availability.passed_mask(date(2030, 1, 2), now), bits)
+        self.assertEqual(bits & ~availability.passed_mask(date(2029, 12, 31), now), 0)
+
+    def test_booking_updates_bitmap(self):
+        doctor    = Doctor.objects.get(user__name = '의사1')
+        patient   = User.objects.get(name = '환자1')
+        status    = Status.objects.get(name = '진료대기')
+        full_date = datetime.now().date()
+
+        slots = availability.day_slots(doctor.id, full_date)
+        self.assertEqual(availability.bits_to_times(slots.working_bits), ['10:00', '10:30', '11:00'])
+        self.assertEqual(slots.booked_bits, 0)
+
+        Reservation.objects.create(
+            user_id = patient.id,
+            doctor_id = doctor.id,
+            symtom = 'asdf',
+            date = full_date,
+            time = time(10, 30),
+            status_id = status.id
+        )
+        slots = availability.day_slots(doctor.id, full_date)
+        self.assertEqual(availability.bits_to_times(slots.booked_bits), ['10:30'])
+
+        availability.release(doctor.id, full_date, time(10, 30))
+        slots = availability.day_slots(doctor.id, full_date)
+        self.assertEqual(slots.booked_bits, 0)
+
+    def test_off_grid_doctor_time_rejected(self):
+        doctor = Doctor.objects.get(user__name = '의사1')
+
+        with self.assertRaises(ValidationError):
+            DoctorTime.objects.create(days = 0, time = '09:15', doctor_id = doctor.id)
+        self.assertFalse(DoctorTime.objects.filter(time = '09:15').exists())
+
+    def test_bitmap_built_after_booking(self):
+        doctor    = Doctor.objects.get(user__name = '의사1')
+        patient   = User.objects.get(name = '환자1')
+        status    = Status.objects.get(name = '진료대기')
+        full_date = datetime.now().date()
+
+        Reservation.objects.create( #비트맵 행이 없을 때의 예약은 행을 만들 때 반영되어야 함
+            user_id = patient.id,
+            doctor_id = doctor.id,
+            symtom = 'asdf',
+            date = full_date,
+            time = time(11, 0),
+            status_id = status.id
+        )
+        self.assertFalse(DoctorAvailability.objects.filter(doctor_id = doctor.id).exists())
+
+        slots = availability.day_slots(doctor.id, full_date)
+        self.assertEqual(availability.bits_to_times(slots.booked_bits), ['11:00'])
+        slots = availability.month_slots(doctor.id, full_date.year, full_date.month)
+        self.assertEqual([availability.bits_to_times(row.booked_bits) for row in slots if row.booked_bits], [['11:00']])
+
+    def test_schedule_change_invalidates_bitmap(self):
+        doctor    = Doctor.objects.get(user__name = '의사1')
+        full_date = datetime.now().date()
+
+        availability.day_slots(doctor.id, full_date)
+        DoctorTime.objects.create(days = full_date.weekday(), time = '14:00', doctor_id = doctor.id)
+        slots = availability.day_slots(doctor.id, full_date)
+
+        self.assertEqual(availability.bits_to_times(slots.working_bits), ['10:00', '10:30', '11:00', '14:00'])
+
+    def test_cached_day_lookup_is_single_query(self):
+        doctor    = Doctor.objects.get(user__name = '의사1')
+        full_date = datetime.now().date()
+
+        availability.day_slots(doctor.id, full_date)
+        with self.assertNumQueries(1):
+            availability.day_slots(doctor.id, full_date)
+
+    def test_month_slots_use_constant_queries(self):
+        doctor    = Doctor.objects.get(user__name = '의사1')
+        full_date = datetime.now().date()
+        first, last = availability.month_range(full_date.year, full_date.month)
+        other_day = last if full_date != last else first
+
+        DoctorDay.objects.create(date = other_day, doctor_id = doctor.id)
+        DoctorTime.objects.create(days = other_day.weekday(), time = '15:00', doctor_id = doctor.id)
+        availability.day_slots(doctor.id, full_date) #일부 날짜만 미리 계산된 상태
+
+        with self.assertNumQueries(9): #생성과 예약 조회를 묶는 savepoint 2회 포함
+            slots = availability.month_slots(doctor.id, full_date.year, full_date.month)
+        with self.assertNumQueries(1):
+            availability.month_slots(doctor.id, full_date.year, full_date.month)
+
+        working = {row.date : availability.bits_to_times(row.working_bits) for row in slots if row.working_bits}
+        self.assertEqual(len(slots), last.day)
+        self.assertEqual(set(working), {full_date, other_day})
+        self.assertIn('15:00', working[other_day])
+
+    def test_status_registry_loads_once(self):
+        waiting  = Status.objects.get(name = '진료대기')
+        canceled = Status.objects.get(name = '진료취소')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(status_registry.id(statuses.WAITING), waiting.id)
+            self.assertEqual(status_registry.name(waiting.id), statuses.WAITING)
+            active = status_registry.active_ids()
+        self.assertNotIn(canceled.id, active)
+        self.assertEqual(len(active), 2)
+
+        canceled.name = '예약취소'
+        canceled.save()
+        self.assertRaises(Status.DoesNotExist, status_registry.id, statuses.CANCELED)
+
+    def test_status_registry_reloads_on_miss(self):
+        names = list(Status.objects.values_list('name', flat=True))
+        Status.objects.all().delete()
+        self.assertEqual(status_registry.names(), {})
+
+        Status.objects.bulk_create([Status(name = name) for name in names]) #bulk_create는 signal로 캐시를 비우지 않음
+        waiting = status_registry.id(statuses.WAITING)
+        self.assertEqual(status_registry.name(waiting), statuses.WAITING)
+
+        Status.objects.bulk_create([Status(name = '보류')])
+        self.assertEqual(status_registry.id('보류'), Status.objects.get(name = '보류').id)
+        self.assertEqual(status_registry.name(Status.objects.get(name = '보류').id), '보류')
+
+    def test_schedule_rule_with_exceptions(self):
+        doctor    = Doctor.objects.get(user__name = '의사1')
+        full_date = datetime.now().date()
+        holiday   = full_date + timedelta(days = 7)
+        extra_day = full_date + timedelta(days = 3)
+
+        DoctorScheduleRule.objects.create(doctor = doctor, days = full_date.weekday(), start_date = full_date)
+        self.assertTrue(availability.day_slots(doctor.id, holiday).working_bits)
+
+        DoctorScheduleException.objects.create(doctor = doctor, date = extra_day, is_working = True)
+        DoctorScheduleException.objects.create(doctor = doctor, date = holiday)
+        working = availability.working_dates([doctor.id], full_date, full_date + timedelta(days = 27))
+
+        self.assertEqual(sorted(day for doctor_id, day in working), [
+            full_date, extra_day, full_date + timedelta(days = 14), full_date + timedelta(days = 21)
+        ])
+        self.assertEqual(availability.day_slots(doctor.id, holiday).working_bits, 0)
+
+        call_command('compact_doctor_days', stdout = StringIO())
+        self.assertFalse(DoctorDay.objects.filter(doctor = doctor).exists())
+        self.assertTrue(availability.day_slots(doctor.id, full_date).working_bits)
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+        return str(cursor.fetchall())
+
+def queries_on(context, table):
+    pattern = re.compile(rf'^SELECT .* FROM [`"]{table}[`"]')
+    return [query['sql'] for query in context.captured_queries if pattern.match(query['sql'])]
+
+class QueryPlanTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        testday   = datetime.now()
+        full_date = date(testday.year, testday.month, testday.day)
+
+        User.objects.bulk_create([
+            User(name = '환자1', 
+                 email = 'patient1@gmail.com',
+                 password = '1q2w3e4r',
+                 is_doctor = False),
+            User(name = '의사1', 
+                 email = 'doctor1@gmail.com',
+                 password = '1q2w3e4r',
+                 is_doctor = True)
+        ])
+
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        doctor   = Doctor.objects.create(
+            user_id = User.objects.get(name = '의사1').id,
+            profile_image = 'image',
+            hospital_id = hospital.id,
+            subject_id = subject.id,
+        )
+
+        DoctorDay.objects.create(date = full_date, doctor_id = doctor.id)
+        DoctorTime.objects.bulk_create([
+            DoctorTime(days = testday.weekday(), time = '10:00', doctor_id = doctor.id),
+            DoctorTime(days = testday.weekday(), time = '11:00', doctor_id = doctor.id),
+        ])
+
+        Status.objects.bulk_create([
+            Status(name = '진료대기'),
+            Status(name = '진료완료'),
+            Status(name = '진료취소')
+        ])
+
+        Reservation.objects.create(
+            user_id = User.objects.get(name = '환자1').id,
+            doctor_id = doctor.id,
+            symtom = 'asdf',
+            date = full_date,
+            time = '10:00',
+            status_id = Status.objects.get(name = '진료대기').id
+        )
+
+    def request(self, method, url, **kwargs):
+        client = Client()
+        user   = User.objects.get(name = '환자1')
+        header = {'HTTP_Authorization' : jwt_generator(user.id)}
+        user_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, **kwargs, **header)
+        return response, context
+
+    def assertUsesIndex(self, queries, index):
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertIn(index, explain(sql), sql)
+
+    def test_working_days_plan(self):
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        today   = datetime.now()
+        response, context = self.request('get', f'/reservations/time/{doctor.id}?year={today.year}&month={today.month}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries_on(context, 'doctor_days')), 1)
+        self.assertUsesIndex(queries_on(context, 'doctor_days'), 'doctor_days_doctor_date_idx')
+
+    def test_working_times_plan(self):
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        today   = datetime.now()
+        response, context = self.request('get', f'/reservations/time/{doctor.id}?year={today.year}&month={today.month}&dates={today.day}')
+
+        self.assertEqual(response.status_code, 200)
+        for table in ('doctor_days', 'doctor_times', 'reservations'): #테이블마다 한 번씩만 조회
+            self.assertEqual(len(queries_on(context, table)), 1, table)
+        self.assertUsesIndex(queries_on(context, 'doctor_days'), 'doctor_days_doctor_date_idx')
+        self.assertUsesIndex(queries_on(context, 'doctor_times'), 'doctor_times_doctor_days_idx')
+        self.assertUsesIndex(queries_on(context, 'reservations'), 'reservations_doctor_slot_idx')
+
+        response, context = self.request('get', f'/reservations/time/{doctor.id}?year={today.year}&month={today.month}&dates={today.day}')
+        for table in ('doctor_days', 'doctor_times', 'reservations'): #두 번째 요청은 저장된 비트맵만 읽음
+            self.assertFalse(queries_on(context, table), table)
+
+    def test_reservation_list_plan(self):
+        response, context = self.request('get', '/reservations/list?page=1&limit=5')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(queries_on(context, 'reservations')) #목록은 조인 없이 읽기 모델만 사용
+        self.assertUsesIndex(queries_on(context, 'reservation_list_entries'), 'list_entries_user_date_idx')
+
+    def test_reservation_create_plan(self):
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        today   = datetime.now()
+        form    = {'doctor_id':doctor.id,
+                   'year':f'{today.year}',
+                   'month':f'{today.month}',
+                   'date':f'{today.day}',
+                   'time':'10:00',
+                   'symptom':'asdf'}
+        response, context = self.request('post', '/reservations', data = form)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'that time already reserved'})
+        self.assertUsesIndex(queries_on(context, 'reservations'), 'reservations_doctor_slot_idx')
+
+class CursorPaginationTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        testday = datetime.now()
+
+        User.objects.bulk_create([
+            User(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False),
+            User(name = '의사1', email = 'doctor1@gmail.com', password = '1q2w3e4r', is_doctor = True),
+            User(name = '의사2', email = 'doctor2@gmail.com', password = '1q2w3e4r', is_doctor = True),
+            User(name = '의사3', email = 'doctor3@gmail.com', password = '1q2w3e4r', is_doctor = True),
+        ])
+
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        Doctor.objects.bulk_create([
+            Doctor(user_id = user.id, profile_image = 'image', hospital_id = hospital.id, subject_id = subject.id)
+            for user in User.objects.filter(is_doctor = True).order_by('id')
+        ])
+
+        status  = Status.objects.create(name = '진료대기')
+        doctor  = Doctor.objects.order_by('id').first()
+        patient = User.objects.get(name = '환자1')
+        Reservation.objects.bulk_create([
+            Reservation(symtom = 'asdf', date = date(testday.year, testday.month, 1), time = '12:00',
+                        doctor_id = doctor.id, status_id = status.id, user_id = patient.id),
+            Reservation(symtom = 'asdf', date = date(testday.year, testday.month, 1), time = '10:00',
+                        doctor_id = doctor.id, status_id = status.id, user_id = patient.id),
+            Reservation(symtom = 'asdf', date = date(testday.year, testday.month, 2), time = '09:00',
+                        doctor_id = doctor.id, status_id = status.id, user_id = patient.id),
+        ])
+        listing.sync(Reservation.objects.values_list('id', flat = True)) #bulk_create는 signal을 보내지 않음
+
+    def header(self):
+        return {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+
+    def test_doctor_cursor_walks_all_pages(self):
+        client  = Client()
+        subject = Subject.objects.get(name = '과목1')
+        header  = self.header()
+
+        with CaptureQueriesContext(connection) as context:
+            first = client.get(f'/reservations/subject/{subject.id}?limit=2&cursor=', **header).json()
+        second    = client.get(f'/reservations/subject/{subject.id}?limit=2&cursor={first["next_cursor"]}', **header).json()
+
+        self.assertEqual([doctor['doctor_name'] for doctor in first['result']], ['의사1', '의사2'])
+        self.assertEqual([doctor['doctor_name'] for doctor in second['result']], ['의사3'])
+        self.assertIsNone(second['next_cursor'])
+        self.assertFalse([query for query in context.captured_queries if 'COUNT(' in query['sql']])
+
+    def test_reservation_cursor_orders_by_date_and_time(self):
+        client = Client()
+        header = self.header()
+
+        first  = client.get('/reservations/list?limit=2&cursor=', **header).json()
+        second = client.get(f'/reservations/list?limit=2&cursor={first["next_cursor"]}', **header).json()
+
+        self.assertEqual([row['time'] for row in first['result']], ['10:00:00', '12:00:00'])
+        self.assertEqual([row['time'] for row in second['result']], ['09:00:00'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_invalid_cursor(self):
+        client   = Client()
+        response = client.get('/reservations/list?cursor=invalid', **self.header())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'invalid cursor'})
+
+class ImageIngestionTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.staging = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(IMAGE_STAGING_ROOT = self.staging))
+        testday   = datetime.now()
+        full_date = date(testday.year, testday.month, testday.day)
+
+        User.objects.bulk_create([
+            User(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False),
+            User(name = '의사1', email = 'doctor1@gmail.com', password = '1q2w3e4r', is_doctor = True),
+        ])
+
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        doctor   = Doctor.objects.create(
+            user_id = User.objects.get(name = '의사1').id,
+            profile_image = 'image',
+            hospital_id = hospital.id,
+            subject_id = subject.id,
+        )
+
+        DoctorDay.objects.create(date = full_date, doctor_id = doctor.id)
+        DoctorTime.objects.create(days = testday.weekday(), time = '11:00', doctor_id = doctor.id)
+        Status.objects.create(name = '진료대기')
+
+    def tearDown(self):
+        for image in ReservationImage.objects.all():
+            for size in IMAGE_VARIANT_SIZES:
+                default_storage.delete(images.variant_name(image.image.name, size))
+            image.image.delete(save = False)
+
+    def test_upload_is_staged_then_finalized(self):
+        client   = Client()
+        header   = {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+        doctor   = Doctor.objects.get(user__name = '의사1')
+        testday  = datetime.now()
+        path     = 'media/doctor_profile_images/default.png'
+        with open(path, 'rb') as file:
+            form = {'doctor_id':doctor.id,
+                    'year':f'{testday.year}',
+                    'month':f'{testday.month}',
+                    'date':f'{testday.day}',
+                    'time':'11:00',
+                    'symptom':'asdf',
+                    'img':[file]}
+            response = client.post('/reservations', form, **header)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(ReservationImage.objects.exists())
+        job = ImageIngestionJob.objects.get()
+        self.assertEqual(job.state, ImageIngestionJob.State.PENDING)
+        self.assertTrue(os.path.exists(job.staged_path))
+
+        self.assertEqual(ingestion.process_pending(), 1)
+
+        image = ReservationImage.objects.get()
+        with open(path, 'rb') as file:
+            self.assertEqual(image.checksum, hashlib.sha256(file.read()).hexdigest())
+        self.assertEqual(ImageIngestionJob.objects.get().state, ImageIngestionJob.State.DONE)
+        self.assertFalse(os.path.exists(job.staged_path))
+        self.assertEqual(ingestion.process_pending(), 0)
+
+    def create_job(self, content = b'image'):
+        patient     = User.objects.get(name = '환자1')
+        doctor      = Doctor.objects.get(user__name = '의사1')
+        reservation = Reservation.objects.create(user_id = patient.id, doctor_id = doctor.id, symtom = 'asdf',
+                                                 date = datetime.now().date(), time = '11:00',
+                                                 status_id = Status.objects.get(name = '진료대기').id)
+        staged_path, original_name = ingestion.stage(SimpleUploadedFile('image.png', content))
+        return ImageIngestionJob.objects.create(reservation = reservation, staged_path = staged_path, original_name = original_name)
+
+    @override_settings(IMAGE_INGESTION_MAX_ATTEMPTS = 2)
+    def test_failed_job_retried_with_backoff(self):
+        job = self.create_job(content = b'not an image')
+        os.remove(job.staged_path)
+
+        self.assertEqual(ingestion.process_pending(), 0)
+        job = ImageIngestionJob.objects.get(id = job.id)
+        self.assertEqual((job.state, job.attempts), (ImageIngestionJob.State.PENDING, 1))
+        self.assertGreater(job.retry_at, datetime.now())
+
+        self.assertEqual(ingestion.process_pending(), 0) #대기 시간 전에는 다시 가져가지 않음
+        self.assertEqual(ImageIngestionJob.objects.get(id = job.id).attempts, 1)
+
+        ImageIngestionJob.objects.filter(id = job.id).update(retry_at = datetime.now() - timedelta(seconds = 1))
+        self.assertEqual(ingestion.process_pending(), 0)
+        job = ImageIngestionJob.objects.get(id = job.id)
+        self.assertEqual((job.state, job.attempts), (ImageIngestionJob.State.FAILED, 2))
+
+    def test_stale_processing_job_reclaimed(self):
+        with open('media/doctor_profile_images/default.png', 'rb') as file:
+            job = self.create_job(content = file.read())
+        ImageIngestionJob.objects.filter(id = job.id).update(state = ImageIngestionJob.State.PROCESSING,
+                                                             updated_at = datetime.now() - timedelta(hours = 1))
+
+        self.assertEqual(ingestion.process_pending(), 0)
+        job = ImageIngestionJob.objects.get(id = job.id)
+        self.assertEqual((job.state, job.attempts, job.error), (ImageIngestionJob.State.PENDING, 1, 'worker timed out'))
+
+        ImageIngestionJob.objects.filter(id = job.id).update(retry_at = None)
+        self.assertEqual(ingestion.process_pending(), 1)
+        self.assertEqual(ImageIngestionJob.objects.get(id = job.id).state, ImageIngestionJob.State.DONE)
+
+    @skipIf(images.Image is None, 'Pillow is not installed')
+    def test_variant_error_keeps_job_done(self):
+        with open('media/doctor_profile_images/default.png', 'rb') as file:
+            job = self.create_job(content = file.read())
+        pixels = images.Image.MAX_IMAGE_PIXELS
+        images.Image.MAX_IMAGE_PIXELS = 1 #썸네일 생성 시 DecompressionBombError
+        self.addCleanup(setattr, images.Image, 'MAX_IMAGE_PIXELS', pixels)
+
+        with self.assertLogs('reservations.ingestion', 'ERROR'):
+            self.assertEqual(ingestion.process_pending(), 1)
+        self.assertEqual(ImageIngestionJob.objects.get(id = job.id).state, ImageIngestionJob.State.DONE)
+        self.assertTrue(ReservationImage.objects.filter(reservation_id = job.reservation_id).exists())
+
+    def test_staged_files_removed_when_booking_fails(self):
+        patient = User.objects.get(name = '환자1')
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        status  = Status.objects.get(name = '진료대기')
+
+        with self.assertRaises(AttributeError): #IntegrityError가 아닌 예외에서도 정리되어야 함
+            ReservationView().book(patient.id, doctor.id, 'asdf', 'not a date', time(11, 0), status.id,
+                                   [SimpleUploadedFile('image.png', b'image')])
+        self.assertEqual(os.listdir(self.staging), [])
+
+class SubjectCacheTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.create(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False)
+        Subject.objects.create(name = '과목1', image = 'image 예시')
+
+    def header(self):
+        return {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+
+    def test_cached_subjects_skip_query(self):
+        client = Client()
+        header = self.header()
+        client.get('/reservations/subject', **header)
+
+        with self.assertNumQueries(0):
+            response = client.get('/reservations/subject', **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'][0]['name'], '과목1')
+
+    def test_etag_returns_not_modified(self):
+        client   = Client()
+        header   = self.header()
+        etag     = client.get('/reservations/subject', **header)['ETag']
+        response = client.get('/reservations/subject', HTTP_IF_NONE_MATCH = etag, **header)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_subject_change_bumps_version(self):
+        client = Client()
+        header = self.header()
+        etag   = client.get('/reservations/subject', **header)['ETag']
+
+        Subject.objects.create(name = '과목2', image = 'image 예시')
+        response = client.get('/reservations/subject', HTTP_IF_NONE_MATCH = etag, **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([subject['name'] for subject in response.json()['result']], ['과목1', '과목2'])
+
+class ConditionalResponseTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        testday   = datetime.now()
+        full_date = date(testday.year, testday.month, testday.day)
+
+        User.objects.bulk_create([
+            User(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False),
+            User(name = '의사1', email = 'doctor1@gmail.com', password = '1q2w3e4r', is_doctor = True),
+        ])
+
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        doctor   = Doctor.objects.create(
+            user_id = User.objects.get(name = '의사1').id,
+            profile_image = 'image',
+            hospital_id = hospital.id,
+            subject_id = subject.id,
+        )
+
+        DoctorDay.objects.create(date = full_date, doctor_id = doctor.id)
+        DoctorTime.objects.bulk_create([
+            DoctorTime(days = testday.weekday(), time = '10:00', doctor_id = doctor.id),
+            DoctorTime(days = testday.weekday(), time = '11:00', doctor_id = doctor.id),
+        ])
+        Status.objects.bulk_create([
+            Status(name = '진료대기'),
+            Status(name = '진료완료'),
+            Status(name = '진료취소')
+        ])
+        Reservation.objects.create(
+            user_id = User.objects.get(name = '환자1').id,
+            doctor_id = doctor.id,
+            symtom = 'asdf',
+            date = full_date,
+            time = '10:00',
+            status_id = Status.objects.get(name = '진료대기').id
+        )
+
+    def header(self):
+        return {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+
+    def test_calendar_not_modified_until_booking(self):
+        client  = Client()
+        header  = self.header()
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        today   = datetime.now()
+        url     = f'/reservations/time/{doctor.id}?year={today.year}&month={today.month}&dates={today.day}'
+        etag    = client.get(url, **header)['ETag']
+
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH = etag, **header).status_code, 304)
+
+        Reservation.objects.create(
+            user_id = User.objects.get(name = '환자1').id,
+            doctor_id = doctor.id,
+            symtom = 'asdf',
+            date = today.date(),
+            time = '11:00',
+            status_id = Status.objects.get(name = '진료대기').id
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH = etag, **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['expired_times'], ['10:00', '11:00'])
+
+    def test_reservation_detail_changes_after_cancel(self):
+        client      = Client()
+        header      = self.header()
+        reservation = Reservation.objects.get(time = '10:00')
+        url         = f'/reservations?res_id={reservation.id}'
+        etag        = client.get(url, **header)['ETag']
+
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH = etag, **header).status_code, 304)
+
+        client.patch(f'{url}&work=cancel', **header)
+        response = client.get(url, HTTP_IF_NONE_MATCH = etag, **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result']['status'], '진료취소')
+
+    @skipIf(images.Image is None, 'Pillow is not installed')
+    def test_reservation_detail_changes_when_variant_built(self):
+        client      = Client()
+        header      = self.header()
+        reservation = Reservation.objects.get(time = '10:00')
+        variant     = images.variant_name('subject_images/child.png', 'small')
+        url         = f'/reservations?res_id={reservation.id}&size=small'
+        ReservationImage.objects.create(reservation = reservation, image = 'subject_images/child.png')
+        default_storage.delete(variant)
+        self.addCleanup(default_storage.delete, variant)
+
+        response = client.get(url, **header)
+        self.assertEqual(response.json()['result']['image'][0]['url'], IP_ADDRESS + 'subject_images/child.png')
+
+        images.variant('subject_images/child.png', 'small') #수집 워커가 썸네일을 만듦
+        response = client.get(url, HTTP_IF_NONE_MATCH = response['ETag'], **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result']['image'][0]['url'], IP_ADDRESS + variant)
+
+    def test_reservation_list_not_modified(self):
+        client = Client()
+        header = self.header()
+        etag   = client.get('/reservations/list', **header)['ETag']
+
+        with self.assertNumQueries(1):
+            response = client.get('/reservations/list', HTTP_IF_NONE_MATCH = etag, **header)
+
+        self.assertEqual(response.status_code, 304)
+
+    async def test_async_client_detail_and_cancel(self):
+        client      = AsyncClient()
+        user        = await User.objects.aget(name = '환자1')
+        reservation = await Reservation.objects.aget(time = '10:00')
+        header      = {'AUTHORIZATION' : jwt_generator(user.id)} #AsyncClient는 키를 그대로 헤더 이름으로 사용
+        url         = f'/reservations?res_id={reservation.id}'
+
+        response = await client.get(url, **header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result']['status'], '진료대기')
+
+        response = await client.patch(f'{url}&work=cancel', **header)
+        self.assertEqual(response.json(), {'message' : 'canceled'})
+
+        reservation = await Reservation.objects.select_related('status').aget(id = reservation.id)
+        self.assertEqual(reservation.status.name, '진료취소')
+
+    async def test_async_client_lists(self):
+        client  = AsyncClient()
+        user    = await User.objects.aget(name = '환자1')
+        subject = await Subject.objects.aget(name = '과목1')
+        header  = {'AUTHORIZATION' : jwt_generator(user.id)}
+
+        response = await client.get('/reservations/subject', **header)
+        self.assertEqual([row['name'] for row in response.json()['result']], ['과목1'])
+
+        response = await client.get(f'/reservations/subject/{subject.id}?page=1', **header)
+        self.assertEqual([row['doctor_name'] for row in response.json()['result']], ['의사1'])
+
+        response = await client.get(f'/reservations/subject/{subject.id}?cursor=&limit=1', **header)
+        self.assertEqual(len(response.json()['result']), 1)
+        self.assertIsNone(response.json()['next_cursor'])
+
+        response = await client.get('/reservations/list', **header)
+        self.assertEqual([row['time'] for row in response.json()['result']], ['10:00:00'])
+
+class DoctorSearchTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        testday = datetime.now().date()
+
+        User.objects.bulk_create([
+            User(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False),
+            User(name = '의사1', email = 'doctor1@gmail.com', password = '1q2w3e4r', is_doctor = True),
+            User(name = '의사2', email = 'doctor2@gmail.com', password = '1q2w3e4r', is_doctor = True),
+        ])
+
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        doctor1  = Doctor.objects.create(user = User.objects.get(name = '의사1'), profile_image = 'image',
+                                         hospital_id = hospital.id, subject_id = subject.id)
+        doctor2  = Doctor.objects.create(user = User.objects.get(name = '의사2'), profile_image = 'image',
+                                         hospital_id = hospital.id, subject_id = subject.id)
+        tomorrow = testday + timedelta(days = 1)
+
+        DoctorDay.objects.bulk_create([
+            DoctorDay(date = testday, doctor_id = doctor1.id),
+            DoctorDay(date = tomorrow, doctor_id = doctor1.id),
+            DoctorDay(date = tomorrow, doctor_id = doctor2.id),
+        ])
+        DoctorTime.objects.bulk_create([
+            DoctorTime(days = testday.weekday(), time = '00:00', doctor_id = doctor1.id), #오늘 이미 지난 시간
+            DoctorTime(days = tomorrow.weekday(), time = '10:00', doctor_id = doctor1.id),
+            DoctorTime(days = tomorrow.weekday(), time = '09:00', doctor_id = doctor2.id),
+            DoctorTime(days = tomorrow.weekday(), time = '09:30', doctor_id = doctor2.id),
+        ])
+        Status.objects.bulk_create([
+            Status(name = '진료대기'),
+            Status(name = '진료완료'),
+            Status(name = '진료취소')
+        ])
+        Reservation.objects.create(
+            user_id = User.objects.get(name = '환자1').id,
+            doctor_id = doctor2.id,
+            symtom = 'asdf',
+            date = tomorrow,
+            time = time(9, 0),
+            status_id = Status.objects.get(name = '진료대기').id
+        )
+
+    def test_earliest_slots_across_doctors(self):
+        client   = Client()
+        header   = {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+        subject  = Subject.objects.get(name = '과목1')
+        doctor1  = Doctor.objects.get(user__name = '의사1')
+        doctor2  = Doctor.objects.get(user__name = '의사2')
+        today    = datetime.now().date()
+        tomorrow = today + timedelta(days = 1)
+
+        with self.assertNumQueries(12): #사용자 + 의사 목록 + 빈 시간 인덱스 조회/생성 10회
+            response = client.get(f'/reservations/search/{subject.id}', **header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['date'], row['time'], row['doctor_id']) for row in response.json()['result']], [
+            (tomorrow.strftime("%Y-%m-%d"), '09:30', doctor2.id),
+            (tomorrow.strftime("%Y-%m-%d"), '10:00', doctor1.id),
+        ])
+        self.assertEqual(response.json()['result'][0]['doctor_name'], '의사2')
+
+    def test_malformed_params_skip_queries(self):
+        client  = Client()
+        header  = {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+        subject = Subject.objects.get(name = '과목1')
+        doctor  = Doctor.objects.get(user__name = '의사1')
+
+        with self.assertNumQueries(1): #사용자 조회만
+            response = client.get(f'/reservations/search/{subject.id}?start=2022-13-01', **header)
+        self.assertEqual(response.json(), {'message' : 'invalid date'})
+
+        with self.assertNumQueries(0):
+            response = client.post('/reservations', {'doctor_id' : doctor.id, 'symptom' : 'a', 'year' : 2030,
+                                   'month' : 1, 'date' : 1, 'time' : '9시'}, **header)
+        self.assertEqual(response.json(), {'message' : 'invalid request'})
+
+    def test_search_range_limit(self):
+        client  = Client()
+        header  = {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '환자1').id)}
+        subject = Subject.objects.get(name = '과목1')
+        today   = datetime.now().date()
+        end     = today + timedelta(days = 40)
+
+        response = client.get(f'/reservations/search/{subject.id}?end={end.strftime("%Y-%m-%d")}', **header)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'search range limit is 31 days'})
+
+class ReservationBulkTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        testday = datetime.now().date()
+
+        User.objects.bulk_create([
+            User(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False),
+            User(name = '의사1', email = 'doctor1@gmail.com', password = '1q2w3e4r', is_doctor = True),
+            User(name = '의사2', email = 'doctor2@gmail.com', password = '1q2w3e4r', is_doctor = True),
+        ])
+
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        doctor1  = Doctor.objects.create(user = User.objects.get(name = '의사1'), profile_image = 'image',
+                                         hospital_id = hospital.id, subject_id = subject.id)
+        doctor2  = Doctor.objects.create(user = User.objects.get(name = '의사2'), profile_image = 'image',
+                                         hospital_id = hospital.id, subject_id = subject.id)
+
+        DoctorDay.objects.create(date = testday, doctor_id = doctor1.id)
+        DoctorTime.objects.bulk_create([
+            DoctorTime(days = testday.weekday(), time = value, doctor_id = doctor1.id)
+            for value in ('10:00', '11:00', '12:00')
+        ])
+        Status.objects.bulk_create([
+            Status(name = '진료대기'),
+            Status(name = '진료완료'),
+            Status(name = '진료취소')
+        ])
+        patient = User.objects.get(name = '환자1')
+        waiting = Status.objects.get(name = '진료대기')
+        ended   = Status.objects.get(name = '진료완료')
+        for symptom, doctor, value, status in [('a', doctor1, time(10, 0), waiting), ('b', doctor1, time(11, 0), waiting),
+                                               ('c', doctor1, time(12, 0), ended), ('d', doctor2, time(10, 0), waiting)]:
+            reservation = Reservation.objects.create(user_id = patient.id, doctor_id = doctor.id, symtom = symptom,
+                                                     date = testday, time = value, status_id = status.id)
+            ReservationSlot.objects.create(reservation = reservation, doctor_id = doctor.id, date = testday, time = value)
+
+    def header(self, name):
+        return {'HTTP_Authorization' : jwt_generator(User.objects.get(name = name).id)}
+
+    def test_bulk_cancel_by_ids(self):
+        client  = Client()
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        today   = datetime.now().date()
+        ids     = [Reservation.objects.get(symtom = symptom).id for symptom in ('a', 'b', 'c', 'd')]
+        availability.day_slots(doctor.id, today)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/reservations/bulk', {'work' : 'cancel', 'ids' : ids + [0]},
+                                   content_type = 'application/json', **self.header('의사1'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['result'] for row in response.json()['result']],
+                         ['canceled', 'canceled', 'already ended or canceled', 'not allowed', 'reservation not exists'])
+        self.assertEqual(len([query for query in context.captured_queries
+                              if query['sql'].startswith('UPDATE "reservations"')]), 1)
+        self.assertEqual(availability.bits_to_times(availability.day_slots(doctor.id, today).booked_bits), ['12:00'])
+        self.assertFalse(ReservationSlot.objects.filter(reservation_id__in = ids[:2]).exists())
+        self.assertEqual(set(ReservationListEntry.objects.filter(reservation_id__in = ids[:2])
+                             .values_list('status_name', flat = True)), {'진료취소'})
+
+    def test_bulk_cancel_publishes_events(self):
+        client  = Client()
+        doctor  = Doctor.objects.get(user__name = '의사1')
+        ids     = [Reservation.objects.get(symtom = symptom).id for symptom in ('a', 'b')]
+        last_id = events.broker.last_id
+
+        with self.captureOnCommitCallbacks(execute = True): #커밋된 변경만 발행됨
+            client.post('/reservations/bulk', {'work' : 'cancel', 'ids' : ids},
+                        content_type = 'application/json', **self.header('의사1'))
+
+        doctor_stream  = client.get(f'/reservations/events?doctor_id={doctor.id}&wait=0',
+                                    HTTP_LAST_EVENT_ID = str(last_id), **self.header('의사1'))
+        patient_stream = client.get(f'/reservations/events?last_event_id={last_id}&wait=0', **self.header('환자1'))
+        idle_stream    = client.get('/reservations/events?wait=0', **self.header('환자1'))
+
+        self.assertEqual(doctor_stream['Content-Type'], 'text/event-stream')
+        self.assertEqual(doctor_stream.content.decode().count('event: slot-freed'), 2)
+        self.assertNotIn('status-changed', doctor_stream.content.decode())
+        self.assertEqual(patient_stream.content.decode().count('event: status-changed'), 2)
+        self.assertEqual(idle_stream.content.decode(), f'retry: 1000\n\nid: {events.broker.last_id}\n\n')
+
+        for wait in ('nan', 'inf', '-1'): #끝나지 않는 대기 방지
+            response = client.get(f'/reservations/events?wait={wait}', **self.header('환자1'))
+            self.assertEqual(response.status_code, 400)
+
+    def test_bulk_complete_by_date_range(self):
+        client = Client()
+        today  = datetime.now().date().strftime("%Y-%m-%d")
+
+        response = client.post('/reservations/bulk', {'work' : 'complete', 'date_from' : today, 'date_to' : today},
+                               content_type = 'application/json', **self.header('의사1'))
+
+        self.assertEqual(sorted(row['result'] for row in response.json()['result']),
+                         ['already ended or canceled', 'completed', 'completed'])
+        self.assertEqual(Reservation.objects.get(symtom = 'd').status.name, '진료대기')
+
+    def test_bulk_patient_not_allowed(self):
+        client   = Client()
+        response = client.post('/reservations/bulk', {'work' : 'cancel', 'ids' : []},
+                               content_type = 'application/json', **self.header('환자1'))
+
+        self.assertEqual(response.status_code, 403)
+
+class DoctorDashboardTest(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        testday = datetime.now().date()
+
+        User.objects.bulk_create([
+            User(name = '환자1', email = 'patient1@gmail.com', password = '1q2w3e4r', is_doctor = False),
+            User(name = '의사1', email = 'doctor1@gmail.com', password = '1q2w3e4r', is_doctor = True),
+        ])
+        hospital = Hospital.objects.create(name = '병원1')
+        subject  = Subject.objects.create(name = '과목1', image = 'image 예시')
+        doctor   = Doctor.objects.create(user = User.objects.get(name = '의사1'), profile_image = 'image',
+                                         hospital_id = hospital.id, subject_id = subject.id)
+
+        DoctorScheduleRule.objects.create(doctor = doctor, days = testday.weekday(), start_date = testday)
+        DoctorTime.objects.bulk_create([
+            DoctorTime(days = testday.weekday(), time = value, doctor_id = doctor.id)
+            for value in ('10:00', '11:00', '12:00')
+        ])
+        Status.objects.bulk_create([
+            Status(name = '진료대기'),
+            Status(name = '진료완료'),
+            Status(name = '진료취소')
+        ])
+        patient = User.objects.get(name = '환자1')
+        for symptom, value, name in [('a', time(12, 0), '진료대기'), ('b', time(10, 0), '진료완료'), ('c', time(11, 0), '진료취소')]:
+            Reservation.objects.create(user_id = patient.id, doctor_id = doctor.id, symtom = symptom, date = testday,
+                                       time = value, status_id = Status.objects.get(name = name).id)
+
+    def test_dashboard_queue_counts_and_week(self):
+        client = Client()
+        header = {'HTTP_Authorization' : jwt_generator(User.objects.get(name = '의사1').id)}
+        today  = datetime.now().date()
+
+        response = client.get('/reservations/dashboard?limit=2', **header)
+        result   = response.json()['result']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['time'] for row in result['queue']], ['10:00', '11:00'])
+        self.assertEqual(result['queue'][0]['patient_name'], '환자1')
+        self.assertEqual(result['counts'], {'진료대기' : 1, '진료완료' : 1, '진료취소' : 1})
+        self.assertEqual(result['week'][0], {'date' : today.strftime("%Y-%m-%d"), 'working' : 3, 'booked' : 2})
+        self.assertEqual(len(result['week']), 7)
+
+        second = client.get(f'/reservations/dashboard?limit=2&cursor={result["next_cursor"]}', **header).json()['result']
+        self.assertEqual([row['time'] for row in second['queue']], ['12:00'])
+        self.assertIsNone(second['next_cursor'])
+
+        etag = response['ETag']
+        with self.assertNumQueries(2): #의사 조회 + 변경 여부 집계
+            self.assertEqual(client.get('/reservations/dashboard?limit=2', HTTP_IF_NONE_MATCH = etag, **header).status_code, 304)
+
+    def test_dashboard_patient_not_allowed(self):
+        client   = Client()
+        response = client.get('/reservations/dashboard', HTTP_Authorization = jwt_generator(User.objects.get(name = '환자1').id))
+
+        self.assertEqual(response.status_code, 403)
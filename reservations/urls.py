@@ -1,11 +1,15 @@
 from django.urls import path
-from reservations.views import SubjectView, DoctorListView, DoctorWorkView,\
-                               ReservationView, ReservationsView
+from reservations.views import SubjectView, DoctorListView, DoctorSearchView, DoctorWorkView, DoctorDashboardView,\
+                               ReservationView, ReservationBulkView, ReservationEventView, ReservationsView
 
 urlpatterns = [
     path('/subject', SubjectView.as_view()),
     path('/subject/<int:subject_id>', DoctorListView.as_view()),
+    path('/search/<int:subject_id>', DoctorSearchView.as_view()),
     path('/time/<int:doctor_id>', DoctorWorkView.as_view()),
+    path('/dashboard', DoctorDashboardView.as_view()),
     path('', ReservationView.as_view()),
+    path('/bulk', ReservationBulkView.as_view()),
+    path('/events', ReservationEventView.as_view()),
     path('/list', ReservationsView.as_view())
 ]
\ No newline at end of file
@@ -1,34 +1,83 @@
-from datetime import datetime, time
+import math
 
-from reservations.models import Reservation, ReservationImage, Status
-from users.models        import Subject, Doctor, DoctorDay, DoctorTime
-from core.functions      import signin_decorator, convertor, patient_decorator
-from voicedoc.settings   import IP_ADDRESS
+from collections import defaultdict
+from datetime    import datetime, timedelta
+
+from reservations          import availability, ingestion, listing, notifications, statuses
+from reservations.models   import Reservation, ReservationImage, ReservationSlot, ReservationListEntry
+from reservations.statuses import status_registry
+from users.models          import Subject, Doctor
+from core.functions        import signin_decorator, convertor, patient_decorator, doctor_decorator
+from core.pagination       import keyset_page, akeyset_page, apage
+from core.images           import apply_variants, ready
+from core.cache            import get_version, aget_version, aget_or_build
+from core.conditional      import make_etag, conditional_response, aconditional_response
+from core.responses        import JsonResponse, list_response, format_columns
+from core.schemas          import Schema, String, Integer, Number, Date, Time, decode
+from core                  import events
+from voicedoc.settings     import IP_ADDRESS, EVENT_WAIT, IMAGE_VARIANT_SIZES
 
 from django.views import View
-from django.http  import JsonResponse
-from django.db    import transaction
+from django.http  import HttpResponse
+from django.db    import transaction, IntegrityError
 from django.db.models.functions import Concat
-from django.db.models           import CharField, Value, Q
-from django.core.paginator      import Paginator
+from django.db.models           import CharField, Value, Count, Max, F
+from asgiref.sync               import sync_to_async
+
+LIST_PARAMS = Schema( #목록 조회 공통 쿼리 파라미터
+    page   = Integer(required = False, default = 1, min_value = 1),
+    limit  = Integer(required = False, default = 5, min_value = 1),
+    cursor = String(required = False),
+    size   = String(required = False, choices = IMAGE_VARIANT_SIZES)
+)
 
 class SubjectView(View):
-    @signin_decorator
-    def get(self, request):
+    schema = Schema(size = String(required = False, choices = IMAGE_VARIANT_SIZES))
+
+    async def subject_list(self, size):
+        fields   = ('id', 'name', 'file_location') + (('image',) if size else ())
         subjects = Subject.objects.annotate(
             file_location = Concat(
                 Value(IP_ADDRESS), 'image', 
                     output_field = CharField()
                 )
             )\
-        .values('id', 'name', 'file_location')        
-        return JsonResponse({"result" : list(subjects), "name" : request.user.name}, status = 200)
+        .values(*fields)
+        subjects = [subject async for subject in subjects]
+        if size: #요청한 크기의 썸네일 주소로 교체
+            await sync_to_async(apply_variants)(subjects, 'image', 'file_location', size)
+        return subjects
+
+    async def subject_response(self, request, size, version):
+        subjects = await aget_or_build('subjects', size or 'original', lambda: self.subject_list(size), version = version)
+        return JsonResponse({"result" : subjects, "name" : request.user.name}, status = 200)
+
+    @signin_decorator
+    async def get(self, request):
+        try:
+            size = self.schema.parse(request.GET)['size']
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
+
+        version = await aget_version('subjects')
+        etag    = make_etag('subjects', version, size, request.user.name) #과목 목록 버전 + 사용자 이름
+
+        return await aconditional_response(request, etag, lambda: self.subject_response(request, size, version))
 
 class DoctorListView(View):
     @signin_decorator
-    def get(self, request, subject_id):
-        page   = int(request.GET.get('page', 1))
-        limit  = int(request.GET.get('limit', 5))
+    async def get(self, request, subject_id):
+        try:
+            params = LIST_PARAMS.parse(request.GET)
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
+
+        etag = make_etag('doctors', await aget_version('doctors'), request.get_full_path())
+        return await aconditional_response(request, etag, lambda: self.doctor_list(params, subject_id))
+
+    async def doctor_list(self, params, subject_id):
+        page, limit, cursor, size = params['page'], params['limit'], params['cursor'], params['size']
+        fields = ('id', 'doctor_name', 'hospital_name', 'subject_name', 'doctor_image') + (('profile_image',) if size else ())
         doctors = Doctor.objects.filter(subject_id = subject_id)\
         .select_related('subject', 'hospital', 'user')\
         .annotate(
@@ -37,115 +86,278 @@ class DoctorListView(View):
             hospital_name = Concat('hospital__name', Value(''),output_field = CharField()),
             subject_name  = Concat('subject__name', Value(''),output_field = CharField()),
             )\
-        .values('id', 'doctor_name', 'hospital_name', 'subject_name', 'doctor_image')\
+        .values(*fields)\
         .order_by('id')
-        doctors = Paginator(doctors, limit)
-        return JsonResponse({'result' : list(doctors.page(page).object_list)}, status = 200)
+
+        if cursor is not None: #cursor 모드는 COUNT/OFFSET 없이 id 기준으로 넘김
+            try:
+                result, next_cursor = await akeyset_page(doctors, ['id'], cursor, limit)
+            except ValueError:
+                return JsonResponse({'message' : 'invalid cursor'}, status = 400)
+            if size:
+                await sync_to_async(apply_variants)(result, 'profile_image', 'doctor_image', size)
+            return list_response(result, next_cursor = next_cursor)
+
+        result = await apage(doctors, page, limit)
+        if size:
+            await sync_to_async(apply_variants)(result, 'profile_image', 'doctor_image', size)
+        return list_response(result)
+
+class DoctorSearchView(View):
+    SEARCH_DAYS = 31
+
+    schema = Schema(
+        start = Date(required = False),
+        end   = Date(required = False),
+        limit = Integer(required = False, default = 10, min_value = 1)
+    )
+
+    @signin_decorator
+    def get(self, request, subject_id):
+        try:
+            params = self.schema.parse(request.GET)
+        except ValueError:
+            return JsonResponse({'message' : 'invalid date'}, status = 400)
+
+        today = datetime.now().date()
+        start = params['start'] or today
+        end   = params['end'] or start + timedelta(days = 6)
+        limit = params['limit']
+
+        if today > start: #과거 날짜 검색 방지
+            return JsonResponse({'message' : "you can't read old calaneder"}, status = 400)
+
+        if start > end or (end - start).days >= self.SEARCH_DAYS:
+            return JsonResponse({'message' : f'search range limit is {self.SEARCH_DAYS} days'}, status = 400)
+
+        doctors = {
+            doctor['id'] : doctor for doctor in Doctor.objects.filter(subject_id = subject_id)\
+            .annotate(
+                doctor_image  = Concat(Value(IP_ADDRESS), 'profile_image', output_field = CharField()),
+                doctor_name   = Concat('user__name', Value(''),output_field = CharField()),
+                hospital_name = Concat('hospital__name', Value(''),output_field = CharField()),
+                )\
+            .values('id', 'doctor_name', 'hospital_name', 'doctor_image')
+        }
+        slots   = availability.earliest_slots(list(doctors), start, end, limit)
+
+        return list_response([{
+            'date'          : day.strftime("%Y-%m-%d"),
+            'time'          : value,
+            'doctor_id'     : doctor_id,
+            'doctor_name'   : doctors[doctor_id]['doctor_name'],
+            'hospital_name' : doctors[doctor_id]['hospital_name'],
+            'doctor_image'  : doctors[doctor_id]['doctor_image']
+        } for day, value, doctor_id in slots])
 
 class DoctorWorkView(View):
+    CALENDAR_MONTHS = 12
+
+    schema = Schema(
+        year  = Integer(min_value = 1, max_value = 9999),
+        month = Integer(min_value = 1, max_value = 12),
+        dates = Integer(required = False, min_value = 1, max_value = 31),
+        view  = String(required = False)
+    )
+
     @signin_decorator
-    def get(self, request, doctor_id):
-        year   = int(request.GET.get('year'))
-        month  = int(request.GET.get('month'))
-        dates  = request.GET.get('dates', None)
+    async def get(self, request, doctor_id):
+        try:
+            params = self.schema.parse(request.GET)
+        except KeyError:
+            return JsonResponse({'message' : 'KeyError'}, status = 400)
+        except ValueError:
+            return JsonResponse({'message' : 'invalid date'}, status = 400)
+
+        year, month, dates, view = params['year'], params['month'], params['dates'], params['view']
+
+        if view == 'month': #한 달 전체의 근무/예약 시간을 한 번에 전달
+            today  = datetime.now().date()
+            months = (year - today.year) * 12 + month - today.month
+            if months < 0: #지난 달 조회 방지
+                return JsonResponse({'message' : "you can't read old calaneder"}, status = 400)
+            if months >= self.CALENDAR_MONTHS:
+                return JsonResponse({'message' : f'calendar range limit is {self.CALENDAR_MONTHS} months'}, status = 400)
+            if not await Doctor.objects.filter(id = doctor_id).aexists():
+                return JsonResponse({'message' : 'doctor not exists'}, status = 400)
 
-        days     = DoctorDay.objects.filter(doctor_id = doctor_id)
-        day_list = [day.date.weekday() for day in days 
-                    if day.date.month == month and day.date.year == year]
+            slots = await sync_to_async(availability.month_slots)(doctor_id, year, month) #비트맵 생성은 트랜잭션이 필요해 스레드에서 실행
+            etag  = make_etag('calendar', doctor_id, year, month,
+                              *[(row.working_bits, row.booked_bits) for row in slots])
+            return conditional_response(request, etag, lambda: JsonResponse({
+                'result' : [{
+                    'date'          : row.date.strftime("%Y-%m-%d"),
+                    'working_times' : availability.bits_to_times(row.working_bits),
+                    'expired_times' : availability.bits_to_times(row.booked_bits)
+                } for row in slots]
+            }, status = 200))
 
-        if dates != None: 
-            full_date = datetime(int(year), int(month), int(dates))
+        if dates != None:
+            try:
+                full_date = datetime(year, month, dates)
+            except ValueError: #2월 30일 등
+                return JsonResponse({'message' : 'invalid date'}, status = 400)
             current   = datetime.now()
             
             if current.date() > full_date.date(): #과거시간 조회 못하게
                 return JsonResponse({'message' : "you can't read old calaneder"}, status = 400)
 
-            if full_date.weekday() not in day_list: #일 없는날 분기1
-                return JsonResponse({'message' : f'not work on {full_date.strftime("%Y-%m-%d")}'}, status = 400)
-
-            reservations  = Reservation.objects.filter(Q(doctor_id = doctor_id, date = full_date, status_id = 1) #취소된 예약의 시간은 불러오지않게
-                                                     | Q(doctor_id = doctor_id, date = full_date, status_id = 2))                
-            working_times = DoctorTime.objects.filter(days = full_date.weekday())
-            time_list     = [time.time.strftime("%H:%M") for time in working_times]
-            expired_time  = [reservation.time.strftime("%H:%M") for reservation in reservations]
+            slots = await sync_to_async(availability.day_slots)(doctor_id, full_date.date())
 
-            if len(time_list) == 0: #일 없는날 분기2
+            if slots.working_bits == 0: #일 없는날 분기
                 return JsonResponse({'message' : f'not work on {full_date.strftime("%Y-%m-%d")}'}, status = 400)
 
-            return JsonResponse({'working_times' : time_list,
-                                 'expired_times' : expired_time}, status = 200)
+            etag = make_etag('slots', doctor_id, slots.date, slots.working_bits, slots.booked_bits)
+            return conditional_response(request, etag, lambda: JsonResponse({
+                'working_times' : availability.bits_to_times(slots.working_bits),
+                'expired_times' : availability.bits_to_times(slots.booked_bits)
+            }, status = 200))
 
-        return JsonResponse({'result' : list(set(day_list))}, status = 200)
+        etag = make_etag('schedule', await aget_version(f'schedule:{doctor_id}'), year, month)
+        return await aconditional_response(request, etag, sync_to_async(lambda: JsonResponse({
+            'result' : availability.working_weekdays(doctor_id, year, month)
+        }, status = 200)))
          
 class ReservationView(View):
+    detail = Schema(
+        res_id = Integer(min_value = 1),
+        size   = String(required = False, choices = IMAGE_VARIANT_SIZES)
+    )
+    change = Schema(
+        res_id = Integer(min_value = 1),
+        work   = String(required = False)
+    )
+    form   = Schema(
+        doctor_id = Integer(min_value = 1),
+        symptom   = String(max_length = 1000),
+        year      = Integer(min_value = 1, max_value = 9999),
+        month     = Integer(min_value = 1, max_value = 12),
+        date      = Integer(min_value = 1, max_value = 31),
+        time      = Time()
+    )
+
     @signin_decorator
-    def get(self, request):
+    async def get(self, request):
         try : 
-            reservation_id = request.GET.get('res_id')
-            reservation    = Reservation.objects.get(id = reservation_id)
+            params         = self.detail.parse(request.GET)
+            reservation_id = params['res_id']
+            reservation    = await Reservation.objects.aget(id = reservation_id)
 
             if reservation.user_id != request.user.id: #다른 환자의 진료 열람 X
                 return JsonResponse({'message' : 'not allowed'}, status = 403)
             
-            images = ReservationImage.objects.filter(reservation_id = reservation.id)\
-                    .annotate(
-                    url = Concat(Value(IP_ADDRESS), 'image', output_field = CharField()),
-                    )
-
-            image_list = [{
-                'url' : image.url,
-                'id'  : image.id
-            } for image in images]
-
-            result = {
-                'status' :  reservation.status.name,
-                'image' : image_list,
-                'symptom' : reservation.symtom,
-                'doctorOpinion' : reservation.opinion,
-                'reservationDate' : convertor(reservation.date, reservation.time)
-                }
-            return JsonResponse({'result' : result}, status = 200)
+            size   = params['size']
+            images = ReservationImage.objects.filter(reservation_id = reservation.id)
+            stamp  = await images.aaggregate(count = Count('id'), last = Max('id')) #이미지 추가 여부만 확인
+            built  = 0
+            if size: #썸네일이 나중에 만들어지면 304 대신 바뀐 주소를 받도록 만들어진 개수도 포함
+                names = {name async for name in images.values_list('image', flat = True) if name}
+                built = len(await sync_to_async(ready)(names, size))
+            etag   = make_etag('reservation', reservation.id, reservation.updated_at, reservation.status_id,
+                               stamp['count'], stamp['last'], size, built)
+            return await aconditional_response(request, etag, lambda: self.reservation_detail(reservation, images, size))
 
         except Reservation.DoesNotExist:
             return JsonResponse({'message' : 'reservation not exists'}, status = 400)
+
+        except KeyError:
+            return JsonResponse({'message' : 'KeyError'}, status = 400)
+
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
     
+    async def reservation_detail(self, reservation, images, size):
+        image_list = [image async for image in images.annotate(
+                url = Concat(Value(IP_ADDRESS), 'image', output_field = CharField()),
+                ).values('url', 'id', *(('image',) if size else ()))]
+        if size: #만들어진 썸네일만 주소를 바꾸고 나머지는 원본
+            await sync_to_async(apply_variants)(image_list, 'image', 'url', size)
+
+        result = {
+            'status' :  await status_registry.aname(reservation.status_id),
+            'image' : image_list,
+            'symptom' : reservation.symtom,
+            'doctorOpinion' : reservation.opinion,
+            'reservationDate' : convertor(reservation.date, reservation.time)
+            }
+        return JsonResponse({'result' : result}, status = 200)
+
+    def cancel(self, reservation, status_id):
+        with transaction.atomic():
+            Reservation.objects.filter(id = reservation.id).update(status_id = status_id, updated_at = datetime.now())
+            ReservationSlot.objects.filter(reservation_id = reservation.id).delete()
+            listing.sync([reservation.id]) #update()는 signal을 보내지 않음
+            availability.release(reservation.doctor_id, reservation.date, reservation.time)
+            notifications.slot_freed(reservation.doctor_id, reservation.date, reservation.time)
+            notifications.status_changed(reservation.user_id, reservation.id, statuses.CANCELED)
+
     @signin_decorator
-    def patch(self, request):
+    async def patch(self, request):
         try: 
-            reservation_id = request.GET.get('res_id')
-            work           = request.GET.get('work')
+            params         = self.change.parse(request.GET)
+            reservation_id = params['res_id']
+            work           = params['work']
             user_id        = request.user.id
-            reservation    = Reservation.objects.get(id = reservation_id)
+            reservation    = await Reservation.objects.aget(id = reservation_id)
 
             if reservation.user_id != user_id:
                 return JsonResponse({'message' : 'not allowed'}, status = 403)
 
             if work == 'cancel':
-                if reservation.status.name == '진료완료' or reservation.status.name == '진료취소': #진료완료거나 취소된거 취소못하게
+                if await status_registry.aname(reservation.status_id) in statuses.ENDED: #진료완료거나 취소된거 취소못하게
                     return JsonResponse({'message' : 'already ended or canceled'}, status = 400)
 
-                status_id = Status.objects.get(name='진료취소').id
-                with transaction.atomic():
-                    Reservation.objects.filter(id = reservation_id).update(status_id = status_id)
-                    return JsonResponse({'message' : 'canceled'}, status = 201)
+                status_id = await status_registry.aid(statuses.CANCELED)
+                await sync_to_async(self.cancel)(reservation, status_id) #트랜잭션은 async ORM에서 쓸 수 없으므로 스레드에서 실행
+                return JsonResponse({'message' : 'canceled'}, status = 201)
         
         except Reservation.DoesNotExist:
             return JsonResponse({'message' : 'reservation not exists'}, status = 400)
 
+        except KeyError:
+            return JsonResponse({'message' : 'KeyError'}, status = 400)
+
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
+
+    def book(self, user_id, doctor_id, symptom, format_date, format_time, status_id, images):
+        staged = []
+        try:
+            for image in images: #트랜잭션 밖에서 스테이징 후 워커가 저장
+                staged.append(ingestion.stage(image))
+            with transaction.atomic(): #슬롯 선점에 실패하면 예약과 이미지 작업 모두 롤백
+                reservation = Reservation.objects.create(
+                    user_id = user_id,
+                    doctor_id = doctor_id,
+                    symtom = symptom,
+                    date = format_date.date(),
+                    time = format_time,
+                    status_id = status_id
+                )
+                ReservationSlot.objects.create(
+                    reservation = reservation,
+                    doctor_id   = doctor_id,
+                    date        = reservation.date,
+                    time        = reservation.time
+                )
+                ingestion.enqueue(reservation, staged)
+                notifications.slot_booked(doctor_id, reservation.date, reservation.time)
+            staged = [] #커밋된 파일은 워커가 정리
+        finally: #어떤 예외로 끝나든 작업이 만들어지지 않은 스테이징 파일은 지움
+            ingestion.discard(staged)
+        return reservation
+
     @patient_decorator
-    def post(self, request):
+    async def post(self, request):
         try : 
             timedate    = datetime.now()
             user_id     = request.user.id
-            doctor_id   = request.POST['doctor_id']
-            symptom     = request.POST['symptom']
-            year        = int(request.POST['year'])
-            month       = int(request.POST['month'])
-            day         = int(request.POST['date'])
-            times       = request.POST['time']
+            params      = self.form.parse(request.POST) #형식 오류는 근무표 조회 전에 거절
+            doctor_id   = params['doctor_id']
+            symptom     = params['symptom']
             images      = request.FILES.getlist('img')
-            format_time = time(int(times[:2]), int(times[3:]))
-            format_date = datetime(year,month,day)
+            format_time = params['time']
+            format_date = datetime(params['year'], params['month'], params['date'])
             
             if len(images) > 6:#이미지 6개 초과 방지
                 return JsonResponse({'message' : 'images upload limit is 6'}, status = 400)
@@ -153,62 +365,247 @@ class ReservationView(View):
             if timedate.date() > format_date.date(): #과거날짜/시간으로 예약 방지
                 return JsonResponse({'message' : 'not allowed to make reservation to old date'}, status = 400)
 
-            if not DoctorDay.objects.filter(date = format_date).exists(): #일 안하는 날에 예약 생성 방지
+            slots = await sync_to_async(availability.day_slots)(doctor_id, format_date.date())
+            if slots.working_bits == 0: #일 안하는 날에 예약 생성 방지
                 return JsonResponse({'message' : 'not working day'}, status = 400)
             
-            working_times = DoctorTime.objects.filter(days = format_date.weekday())
-            time_list     = [time.time.strftime("%H:%M") for time in working_times]
-            if times not in time_list: #일 안하는 시간에 예약 생성 방지
+            if not slots.working_bits & availability.slot_mask(format_time): #일 안하는 시간에 예약 생성 방지
                 return JsonResponse({'message' : 'not working time'}, status = 400)
 
-            if Reservation.objects.filter(Q(doctor_id = doctor_id, date = format_date, time = format_time, status_id = 1) 
-                                        | Q(doctor_id = doctor_id, date = format_date, time = format_time, status_id = 2)).exists():#취소된 예약 제외 중복시간 방지
+            if slots.booked_bits & availability.slot_mask(format_time): #취소된 예약 제외 중복시간 방지
                 return JsonResponse({'message' : 'that time already reserved'}, status = 400)
 
-            with transaction.atomic():
-                status = Status.objects.get(name="진료대기")
-                Reservation.objects.create(
-                    user_id = user_id,
-                    doctor_id = doctor_id,
-                    symtom = symptom,
-                    date = format_date.strftime("%Y-%m-%d"),
-                    time = times,
-                    status_id = status.id
-                )
-            with transaction.atomic():
-                reservation = Reservation.objects.get(user_id = user_id, doctor_id = doctor_id, symtom = symptom, 
-                                                      time = format_time,status_id = status.id, date = format_date)
-                imgs = [
-                    ReservationImage(
-                        image          = image,
-                        reservation_id = reservation.id
-                    )
-                    for image in images
-                ]
-                ReservationImage.objects.bulk_create(imgs)
+            status_id = await status_registry.aid(statuses.WAITING)
+            await sync_to_async(self.book)(user_id, doctor_id, symptom, format_date, format_time, status_id, images)
             return JsonResponse({'message' : 'reservation created'}, status = 201)
 
+        except IntegrityError: #동시에 같은 슬롯을 먼저 선점한 예약이 있는 경우
+            return JsonResponse({'message' : 'that time already reserved'}, status = 400)
+
         except KeyError:
             return JsonResponse({'message' : 'KeyError'}, status = 400)
 
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
+
+class ReservationBulkView(View):
+    BULK_LIMIT  = 500
+    BULK_DAYS   = 31
+    TRANSITIONS = {'cancel' : (statuses.CANCELED, 'canceled'), 'complete' : (statuses.DONE, 'completed')}
+
+    by_ids   = Schema(work = String(), ids = Integer(many = True)) #없는 id는 id별 결과로 알려줌
+    by_range = Schema(work = String(), date_from = Date(), date_to = Date())
+
+    def apply(self, user_id, work, ids, date_range):
+        status_name, done = self.TRANSITIONS[work]
+        target  = status_registry.id(status_name)
+        waiting = status_registry.id(statuses.WAITING)
+
+        with transaction.atomic():
+            reservations = Reservation.objects.select_for_update(of = ('self',))
+            if ids is not None:
+                reservations = reservations.filter(id__in = ids)
+            else: #의사 본인의 기간 내 예약 전체
+                reservations = reservations.filter(doctor__user_id = user_id, date__range = date_range)
+            rows = list(reservations.values('id', 'user_id', 'doctor_id', 'doctor__user_id', 'status_id', 'date', 'time')) #권한 확인까지 한 번에 조회
+
+            results = {}
+            changed = []
+            for row in rows:
+                if row['doctor__user_id'] != user_id:
+                    results[row['id']] = 'not allowed'
+                elif row['status_id'] != waiting: #진료완료거나 취소된거 다시 못바꾸게
+                    results[row['id']] = 'already ended or canceled'
+                else:
+                    results[row['id']] = done
+                    changed.append(row)
+
+            changed_ids = [row['id'] for row in changed]
+            if changed_ids:
+                Reservation.objects.filter(id__in = changed_ids).update(status_id = target, updated_at = datetime.now())
+                if work == 'cancel':
+                    ReservationSlot.objects.filter(reservation_id__in = changed_ids).delete()
+                    released = defaultdict(list)
+                    for row in changed:
+                        released[row['doctor_id'], row['date']].append(row['time'])
+                    for (doctor_id, day), times in released.items():
+                        availability.release(doctor_id, day, *times)
+                listing.sync(changed_ids) #update()는 signal을 보내지 않음
+
+            for row in changed:
+                if work == 'cancel':
+                    notifications.slot_freed(row['doctor_id'], row['date'], row['time'])
+                notifications.status_changed(row['user_id'], row['id'], status_name)
+
+        if ids is None:
+            ids = [row['id'] for row in rows]
+        return [{'id' : reservation_id, 'result' : results.get(reservation_id, 'reservation not exists')} for reservation_id in ids]
+
+    @doctor_decorator
+    def post(self, request):
+        try:
+            data   = decode(request.body)
+            params = (self.by_ids if data.get('ids', None) is not None else self.by_range).parse(data)
+            work   = params['work']
+            ids    = params.get('ids', None)
+
+            if work not in self.TRANSITIONS:
+                return JsonResponse({'message' : 'invalid work'}, status = 400)
+
+            if ids is not None:
+                date_range = None
+                if len(ids) > self.BULK_LIMIT:
+                    return JsonResponse({'message' : f'bulk limit is {self.BULK_LIMIT}'}, status = 400)
+            else:
+                date_range = (params['date_from'], params['date_to'])
+                if date_range[0] > date_range[1] or (date_range[1] - date_range[0]).days >= self.BULK_DAYS:
+                    return JsonResponse({'message' : f'bulk range limit is {self.BULK_DAYS} days'}, status = 400)
+
+            result = self.apply(request.user.id, work, ids, date_range)
+            return list_response(result)
+
+        except KeyError:
+            return JsonResponse({'message' : 'KeyError'}, status = 400)
+
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
+
+class DoctorDashboardView(View):
+    WEEK_DAYS = 7
+
+    schema = Schema(
+        cursor = String(required = False),
+        limit  = Integer(required = False, default = 20, min_value = 1)
+    )
+
+    def dashboard(self, doctor_id, today, cursor, limit):
+        queue = Reservation.objects.filter(doctor_id = doctor_id, date = today)\
+                .values('id', 'time', 'status_id', 'symtom', patient_name = F('user__name'))
+        try:
+            rows, next_cursor = keyset_page(queue, ['time', 'id'], cursor, limit)
+        except ValueError:
+            return JsonResponse({'message' : 'invalid cursor'}, status = 400)
+
+        result = {
+            'queue' : [{
+                'reservation_id' : row['id'],
+                'time'           : row['time'].strftime("%H:%M"),
+                'status'         : status_registry.name(row['status_id']),
+                'patient_name'   : row['patient_name'],
+                'symptom'        : row['symtom']
+            } for row in rows],
+            'next_cursor' : next_cursor
+        }
+        if cursor: #다음 페이지는 대기열만 전달
+            return JsonResponse({'result' : result}, status = 200)
+
+        last   = today + timedelta(days = self.WEEK_DAYS - 1)
+        counts = Reservation.objects.filter(doctor_id = doctor_id, date = today)\
+                 .values('status_id').annotate(count = Count('id')).order_by()
+        booked = Reservation.objects.filter(doctor_id = doctor_id, date__range = (today, last),
+                                            status_id__in = status_registry.active_ids())\
+                 .values('date').annotate(count = Count('id')).order_by()
+        booked = {row['date'] : row['count'] for row in booked}
+
+        result['date']   = today.strftime("%Y-%m-%d")
+        result['counts'] = {status_registry.name(row['status_id']) : row['count'] for row in counts}
+        result['week']   = [{
+            'date'    : slots.date.strftime("%Y-%m-%d"),
+            'working' : bin(slots.working_bits).count('1'), #근무 시간 칸 수
+            'booked'  : booked.get(slots.date, 0)
+        } for slots in availability.range_slots([doctor_id], today, last)]
+        return JsonResponse({'result' : result}, status = 200)
+
+    @doctor_decorator
+    def get(self, request):
+        try:
+            params = self.schema.parse(request.GET)
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
+
+        try:
+            doctor = Doctor.objects.get(user_id = request.user.id)
+        except Doctor.DoesNotExist:
+            return JsonResponse({'message' : 'doctor not exists'}, status = 400)
+
+        today  = datetime.now().date()
+        cursor = params['cursor']
+        limit  = params['limit']
+        stamp  = Reservation.objects.filter(doctor_id = doctor.id,
+                                            date__range = (today, today + timedelta(days = self.WEEK_DAYS - 1)))\
+                 .aggregate(count = Count('id'), updated = Max('updated_at')) #폴링 시 변경이 없으면 304
+        etag   = make_etag('dashboard', doctor.id, today, stamp['count'], stamp['updated'],
+                           get_version(f'schedule:{doctor.id}'), request.get_full_path())
+        return conditional_response(request, etag, lambda: self.dashboard(doctor.id, today, cursor, limit))
+
+class ReservationEventView(View):
+    schema = Schema(
+        doctor_id     = Integer(required = False, default = (), many = True),
+        wait          = Number(required = False, default = EVENT_WAIT, min_value = 0),
+        last_event_id = Integer(required = False, min_value = 0)
+    )
+    last_event_id = Integer(min_value = 0)
+
+    @signin_decorator
+    async def get(self, request):
+        try:
+            params   = self.schema.parse(request.GET)
+            channels = {notifications.user_channel(request.user.id)} | {
+                notifications.doctor_channel(doctor_id) for doctor_id in params['doctor_id']
+            }
+            wait     = params['wait']
+            if not math.isfinite(wait): #?wait=nan 이면 대기가 끝나지 않음
+                raise ValueError('invalid wait')
+            wait     = min(max(wait, 0), EVENT_WAIT)
+            header   = request.headers.get('Last-Event-ID', None)
+            last_id  = self.last_event_id.coerce(header) if header else params['last_event_id']
+            last_id  = events.broker.last_id if last_id is None else last_id #첫 접속은 지금부터의 변경만 전달
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
+
+        if events.broker.expired(last_id): #놓친 이벤트가 버퍼에 없으면 전체를 다시 조회하도록 알림
+            body = events.stream([(events.broker.last_id, None, 'reset', {})], events.broker.last_id)
+        else:
+            received = await events.broker.listen(channels, last_id, wait) #기다리는 동안 스레드를 점유하지 않음
+            body     = events.stream(received, last_id)
+
+        response = HttpResponse(body, content_type = 'text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
 class ReservationsView(View):
     @signin_decorator
-    def get(self, request):
-        page   = int(request.GET.get('page', 1))
-        limit  = int(request.GET.get('limit', 5))
-        reservations = Reservation.objects.filter(user_id = request.user.id)\
-                        .select_related('doctor', 'status', 'user')\
-                        .annotate(
-                            doctor_image   = Concat(Value(IP_ADDRESS), 'doctor__profile_image', output_field = CharField()),
-                            doctor_name    = Concat('doctor__user__name', Value(''), output_field = CharField()),
-                            hospital_name  = Concat('doctor__hospital__name', Value(''), output_field = CharField()),
-                            subject_name   = Concat('doctor__subject__name', Value(''), output_field = CharField()),
-                            status_name    = Concat('status__name', Value('') ,output_field = CharField()),
-                            reservation_id = Concat('id', Value(''), output_field = CharField()),)\
-                        .values('status_name','doctor_image', 'doctor_name', 'hospital_name', 'subject_name', 'reservation_id','date','time')\
-                        .order_by('date', 'time')
-        reservations = Paginator(reservations, limit)
-        return JsonResponse({'result' : list(reservations.page(page).object_list)}, status = 200)
+    async def get(self, request):
+        try:
+            params = LIST_PARAMS.parse(request.GET)
+        except ValueError:
+            return JsonResponse({'message' : 'invalid request'}, status = 400)
 
-            
+        stamp = await ReservationListEntry.objects.filter(user_id = request.user.id)\
+                .aaggregate(count = Count('reservation_id'), updated = Max('updated_at'))
+        etag  = make_etag('reservations', request.user.id, stamp['count'], stamp['updated'], request.get_full_path())
+        return await aconditional_response(request, etag, lambda: self.reservation_list(request.user.id, params))
+
+    async def reservation_list(self, user_id, params):
+        page, limit, cursor, size = params['page'], params['limit'], params['cursor'], params['size']
+        reservations = ReservationListEntry.objects.filter(user_id = user_id)\
+                        .annotate(doctor_image = Concat(Value(IP_ADDRESS), 'doctor_profile_image', output_field = CharField()))
+        fields = ('status_name','doctor_image', 'doctor_name', 'hospital_name', 'subject_name', 'reservation_id','date','time')\
+                 + (('doctor_profile_image',) if size else ())
+
+        if cursor is not None: #cursor 모드는 (date, time, id) 기준으로 넘김
+            try:
+                result, next_cursor = await akeyset_page(reservations.values(*fields), ['date', 'time', 'reservation_id'], cursor, limit)
+            except ValueError:
+                return JsonResponse({'message' : 'invalid cursor'}, status = 400)
+            return list_response(await self.format(result, size), next_cursor = next_cursor)
+
+        result = await apage(reservations.values(*fields).order_by('date', 'time', 'reservation_id'), page, limit)
+        return list_response(await self.format(result, size))
 
+    async def format(self, rows, size):
+        for row in rows:
+            row['reservation_id'] = str(row['reservation_id']) #기존 응답 형식(문자열 id) 유지
+        if size:
+            await sync_to_async(apply_variants)(rows, 'doctor_profile_image', 'doctor_image', size)
+        return format_columns(rows, date = "%Y-%m-%d", time = "%H:%M:%S")
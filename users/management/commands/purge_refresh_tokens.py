@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from users.models import RefreshToken
+
+class Command(BaseCommand):
+    help = 'delete expired refresh tokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='only count the rows that would be deleted')
+
+    def handle(self, *args, **options):
+        tokens = RefreshToken.objects.filter(expires_at__lte = datetime.now()) #폐기된 토큰도 만료 전까지는 재사용 감지에 필요
+        if options['dry_run']:
+            deleted = tokens.count()
+        else:
+            deleted = tokens.delete()[0]
+        self.stdout.write(f'{"would delete" if options["dry_run"] else "deleted"} {deleted} refresh tokens')
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.4 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_reservations'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctorday',
+            index=models.Index(fields=['doctor', 'date'], name='doctor_days_doctor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctortime',
+            index=models.Index(fields=['doctor', 'days'], name='doctor_times_doctor_days_idx'),
+        ),
+    ]
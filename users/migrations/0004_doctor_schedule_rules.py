@@ -0,0 +1,47 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorScheduleRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.IntegerField(choices=[(0, 'Mon'), (1, 'Tue'), (2, 'Wed'), (3, 'Thu'), (4, 'Fri'), (5, 'Sat'), (6, 'Sun')])),
+                ('start_date', models.DateField(help_text='YYYY-MM-DD')),
+                ('end_date', models.DateField(help_text='YYYY-MM-DD', null=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_rule', to='users.doctor')),
+            ],
+            options={
+                'db_table': 'doctor_schedule_rules',
+            },
+        ),
+        migrations.CreateModel(
+            name='DoctorScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='YYYY-MM-DD')),
+                ('is_working', models.BooleanField(default=False)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_exception', to='users.doctor')),
+            ],
+            options={
+                'db_table': 'doctor_schedule_exceptions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='doctorschedulerule',
+            index=models.Index(fields=['doctor', 'start_date'], name='schedule_rules_doctor_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctorscheduleexception',
+            constraint=models.UniqueConstraint(fields=('doctor', 'date'), name='schedule_exceptions_doctor_date_uniq'),
+        ),
+    ]
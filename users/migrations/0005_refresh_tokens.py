@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_doctor_schedule_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('family', models.UUIDField()),
+                ('token_hash', models.CharField(max_length=64, unique=True)),
+                ('expires_at', models.DateTimeField()),
+                ('revoked', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_token', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'refresh_tokens',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['family'], name='refresh_tokens_family_idx'),
+        ),
+    ]
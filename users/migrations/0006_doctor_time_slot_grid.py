@@ -0,0 +1,38 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:35
+
+from datetime import time
+
+from django.db import migrations, models
+import users.models
+
+
+def snap_off_grid_times(apps, schema_editor):
+    DoctorTime         = apps.get_model('users', 'DoctorTime')
+    DoctorAvailability = apps.get_model('reservations', 'DoctorAvailability')
+
+    doctor_ids = set()
+    for row in DoctorTime.objects.all().iterator(): #칸 중간의 시간은 그 시간이 속한 칸의 시작으로 옮김
+        minutes  = row.time.hour * 60 + row.time.minute
+        minutes -= minutes % users.models.SLOT_MINUTES
+        snapped  = time(minutes // 60, minutes % 60)
+        if snapped != row.time:
+            DoctorTime.objects.filter(id = row.id).update(time = snapped)
+            doctor_ids.add(row.doctor_id)
+    DoctorAvailability.objects.filter(doctor_id__in = doctor_ids).delete() #옮기기 전 시간이 빠진 비트맵은 다시 계산
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_refresh_tokens'),
+        ('reservations', '0002_doctor_availability'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='doctortime',
+            name='time',
+            field=models.TimeField(validators=[users.models.validate_slot_time]),
+        ),
+        migrations.RunPython(snap_off_grid_times, migrations.RunPython.noop),
+    ]
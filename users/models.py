@@ -1,8 +1,17 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from django.core.exceptions     import ValidationError
+
+from core.hashing import hashing_pool
+
+SLOT_MINUTES = 30 #예약 가능 시간은 30분 단위 칸으로만 관리
+
+def validate_slot_time(value):
+    if (value.hour * 60 + value.minute) % SLOT_MINUTES or value.second or value.microsecond:
+        raise ValidationError(f'time must be on a {SLOT_MINUTES} minute slot', code='off_grid')
 
 class UserManager(BaseUserManager):
-    def create_user(self, name, email, is_doctor, password):
+    def check_fields(self, name, email, is_doctor, password):
         if not name:            
             raise ValueError('must have user name')
         if not email:            
@@ -12,16 +21,29 @@ class UserManager(BaseUserManager):
         if not password:            
             raise ValueError('must have user password')
 
+    def create_user(self, name, email, is_doctor, password):
+        self.check_fields(name, email, is_doctor, password)
+
         user = self.model(            
             email     = self.normalize_email(email),         
             name      = name,
-            is_doctor = is_doctor
+            is_doctor = is_doctor,
+            password  = hashing_pool.make(password)
         )
 
-        user.set_password(password)        
         user.save(using=self._db)        
         return user
 
+    async def acreate_user(self, name, email, is_doctor, password):
+        self.check_fields(name, email, is_doctor, password)
+
+        return await self.acreate(
+            email     = self.normalize_email(email),
+            name      = name,
+            is_doctor = is_doctor,
+            password  = await hashing_pool.amake(password) #해싱을 기다리는 동안 이벤트 루프를 막지 않음
+        )
+
 class User(AbstractBaseUser):
     name         = models.CharField(max_length=100)
     email        = models.EmailField(verbose_name='email', max_length=255, unique=True)
@@ -49,6 +71,9 @@ class DoctorDay(models.Model):
 
     class Meta:
         db_table = 'doctor_days'
+        indexes  = [
+            models.Index(fields=['doctor', 'date'], name='doctor_days_doctor_date_idx'),
+        ]
 
 class DoctorTime(models.Model):
     class Day(models.IntegerChoices):
@@ -63,10 +88,55 @@ class DoctorTime(models.Model):
     doctor = models.ForeignKey('users.Doctor', on_delete=models.CASCADE,
                                 related_name = 'doctor_time')
     days   = models.IntegerField(choices=Day.choices)
-    time   = models.TimeField()
+    time   = models.TimeField(validators=[validate_slot_time])
 
     class Meta:
         db_table = 'doctor_times'
+        indexes  = [
+            models.Index(fields=['doctor', 'days'], name='doctor_times_doctor_days_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        validate_slot_time(self._meta.get_field('time').to_python(self.time)) #칸에 맞지 않는 시간은 비트맵에서 사라지므로 저장 전에 거절
+        super().save(*args, **kwargs)
+
+class DoctorScheduleRule(models.Model):
+    doctor     = models.ForeignKey('users.Doctor', on_delete=models.CASCADE,
+                                   related_name = 'schedule_rule')
+    days       = models.IntegerField(choices=DoctorTime.Day.choices)
+    start_date = models.DateField(help_text="YYYY-MM-DD")
+    end_date   = models.DateField(help_text="YYYY-MM-DD", null=True) #null이면 종료일 없이 매주 반복
+
+    class Meta:
+        db_table = 'doctor_schedule_rules'
+        indexes  = [
+            models.Index(fields=['doctor', 'start_date'], name='schedule_rules_doctor_idx'),
+        ]
+
+class DoctorScheduleException(models.Model):
+    doctor     = models.ForeignKey('users.Doctor', on_delete=models.CASCADE,
+                                   related_name = 'schedule_exception')
+    date       = models.DateField(help_text="YYYY-MM-DD")
+    is_working = models.BooleanField(default=False) #False : 휴무일, True : 규칙 밖의 추가 근무일
+
+    class Meta:
+        db_table    = 'doctor_schedule_exceptions'
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'date'], name='schedule_exceptions_doctor_date_uniq'),
+        ]
+
+class RefreshToken(models.Model):
+    user       = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name = 'refresh_token')
+    family     = models.UUIDField() #한 로그인에서 교체되며 이어지는 토큰 묶음
+    token_hash = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField()
+    revoked    = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'refresh_tokens'
+        indexes  = [
+            models.Index(fields=['family'], name='refresh_tokens_family_idx'),
+        ]
 
 class Hospital(models.Model):
     name = models.CharField(max_length=30)
@@ -1,8 +1,13 @@
 import json
 
 from django.test  import Client, TransactionTestCase, TestCase
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.signals import user_login_failed
 from users.models import User
-from core.functions import jwt_generator
+from core.functions import jwt_decoder
+from core.hashing   import hashing_pool
+from core.emails    import email_index
+from core.cache     import bump_version
 
 class UserSignupTest(TestCase):
     def setUp(self):
@@ -179,7 +184,9 @@ class UserSigninTest(TestCase):
 
         response = client.post('/users/signin', json.dumps(form), content_type='application/json')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), {'message' : 'signin success', 'token' : jwt_generator(user_id)})
+        self.assertEqual(response.json()['message'], 'signin success')
+        self.assertEqual(jwt_decoder(response.json()['token'])['user_id'], user_id)
+        self.assertIn('refresh_token', response.json())
 
     def test_user_signin_fail(self):
         client = Client()
@@ -196,7 +203,9 @@ class UserSigninTest(TestCase):
 
         response = client.post('/users/signin', json.dumps(form), content_type='application/json')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), {'message' : 'signin success for doctor', 'token' : jwt_generator(user_id)})
+        self.assertEqual(response.json()['message'], 'signin success for doctor')
+        self.assertEqual(jwt_decoder(response.json()['token'])['user_id'], user_id)
+        self.assertIn('refresh_token', response.json())
 
     def test_doctor_signin_fail(self):
         client = Client(HTTP_USER_AGENT='Darwin')
@@ -204,4 +213,149 @@ class UserSigninTest(TestCase):
 
         response = client.post('/users/signin', json.dumps(form), content_type='application/json')
         self.assertEqual(response.status_code, 400)
-        self.assertEqual(response.json(), {'message' : 'signin failed because you are not patient'})
\ No newline at end of file
+        self.assertEqual(response.json(), {'message' : 'signin failed because you are not patient'})
+
+    def test_signin_fail_sends_signal(self):
+        client  = Client()
+        failed  = []
+        handler = lambda sender, credentials, request, **kwargs: failed.append(credentials)
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+
+        client.post('/users/signin', json.dumps({'email' : 'patient@gmail.com', 'password' : 'asdf1234'}), content_type='application/json')
+        client.post('/users/signin', json.dumps({'email' : 'nobody@gmail.com', 'password' : 'asdf1234'}), content_type='application/json')
+
+        self.assertEqual([credentials['email'] for credentials in failed], ['patient@gmail.com', 'nobody@gmail.com'])
+        self.assertNotIn('asdf1234', str(failed))
+
+class UserRehashTest(TestCase):
+    def setUp(self):
+        User.objects.create(
+            name      = 'patient',
+            email     = 'patient@gmail.com',
+            is_doctor = False,
+            password  = get_hasher().encode('1q2w3e4r', 'oldsalt', iterations = 1000)
+        )
+
+    def test_signin_rehashes_outdated_password(self):
+        client   = Client()
+        form     = {'email' : 'patient@gmail.com', 'password' : '1q2w3e4r'}
+        rehashed = hashing_pool.stats()['rehashed']
+
+        response = client.post('/users/signin', json.dumps(form), content_type='application/json')
+        user     = User.objects.get(email = 'patient@gmail.com')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(get_hasher().must_update(user.password))
+        self.assertTrue(user.check_password('1q2w3e4r'))
+        self.assertEqual(hashing_pool.stats()['rehashed'], rehashed + 1)
+
+    def test_wrong_password_keeps_hash(self):
+        client  = Client()
+        form    = {'email' : 'patient@gmail.com', 'password' : 'asdf1234'}
+        encoded = User.objects.get(email = 'patient@gmail.com').password
+
+        response = client.post('/users/signin', json.dumps(form), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(User.objects.get(email = 'patient@gmail.com').password, encoded)
+
+class RefreshTokenTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            name      = 'patient',
+            email     = 'patient@gmail.com',
+            is_doctor = 'False',
+            password  = '1q2w3e4r'
+        )
+        form = {'email' : 'patient@gmail.com', 'password' : '1q2w3e4r'}
+        self.tokens = Client().post('/users/signin', json.dumps(form), content_type='application/json').json()
+
+    def refresh(self, token):
+        return Client().post('/users/token/refresh', json.dumps({'refresh_token' : token}), content_type='application/json')
+
+    def test_access_token_skips_user_query(self):
+        client = Client()
+
+        with self.assertNumQueries(0):
+            response = client.post('/users/check', HTTP_Authorization = self.tokens['token'])
+        self.assertEqual(response.json()['your id'], User.objects.get(email = 'patient@gmail.com').id)
+
+    def test_refresh_rotates(self):
+        response = self.refresh(self.tokens['refresh_token'])
+        rotated  = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(rotated['refresh_token'], self.tokens['refresh_token'])
+        self.assertEqual(jwt_decoder(rotated['token'])['name'], 'patient')
+        self.assertEqual(self.refresh(rotated['refresh_token']).status_code, 200)
+
+    def test_reused_token_revokes_family(self):
+        rotated = self.refresh(self.tokens['refresh_token']).json()
+
+        response = self.refresh(self.tokens['refresh_token'])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'message' : 'refresh token reused'})
+        self.assertEqual(self.refresh(rotated['refresh_token']).status_code, 401)
+
+    def test_signout_revokes(self):
+        client   = Client()
+        response = client.post('/users/signout', json.dumps({'refresh_token' : self.tokens['refresh_token']}), content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(self.tokens['refresh_token']).status_code, 401)
+        self.assertEqual(self.refresh('unknown').json(), {'message' : 'invalid refresh token'})
+
+class EmailIndexTest(TestCase):
+    def setUp(self):
+        email_index.clear()
+        User.objects.create(
+            name      = 'test',
+            email     = 'test1@gmail.com',
+            password  = '1q2w3e4r',
+            is_doctor = False
+        )
+
+    def tearDown(self):
+        email_index.clear()
+
+    def check(self, email):
+        return Client().post('/users/email_check', json.dumps({'email' : email}), content_type='application/json')
+
+    def test_available_email_skips_query(self):
+        self.check('test1@gmail.com')
+
+        with self.assertNumQueries(0):
+            response = self.check('test2@gmail.com')
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeated_probe_is_cached(self):
+        with self.assertNumQueries(3): #필터 생성(count, 전체 이메일) + 확인
+            self.check('test1@gmail.com')
+        with self.assertNumQueries(0):
+            response = self.check('test1@gmail.com')
+        self.assertEqual(response.json(), {'message' : 'email already exists'})
+
+    def test_new_user_is_added(self):
+        self.check('test2@gmail.com')
+        User.objects.create(name = 'test2', email = 'test2@gmail.com', password = '1q2w3e4r', is_doctor = False)
+
+        self.assertEqual(self.check('test2@gmail.com').status_code, 400)
+
+    def test_signup_in_other_process_is_seen(self):
+        self.check('test2@gmail.com')
+        #다른 프로세스의 가입은 이 프로세스의 시그널 없이 캐시 버전만 바뀜
+        User.objects.bulk_create([User(name = 'test2', email = 'test2@gmail.com', password = '1q2w3e4r', is_doctor = False)])
+        bump_version('emails')
+
+        self.assertEqual(self.check('test2@gmail.com').status_code, 400)
+
+    def test_rebuild_in_progress_keeps_old_filter(self):
+        self.check('test2@gmail.com')
+        bloom = email_index.filter
+        email_index.built_at -= email_index.rebuild
+
+        with email_index.building: #다른 스레드가 재구성 중
+            email_index.refreshed_at = 0
+            with self.assertNumQueries(1): #전체를 다시 읽지 않고 새 가입만 가져옴
+                self.check('test3@gmail.com')
+        self.assertIs(email_index.filter, bloom)
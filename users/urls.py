@@ -1,9 +1,11 @@
 from django.urls import path
-from users.views import SignupView, SigninView, EmailUniqueCheckView, UserIdCheck
+from users.views import SignupView, SigninView, EmailUniqueCheckView, UserIdCheck, TokenRefreshView, SignoutView
 
 urlpatterns = [
     path('/signup', SignupView.as_view()),
     path('/email_check', EmailUniqueCheckView.as_view()),
     path('/signin', SigninView.as_view()),
+    path('/token/refresh', TokenRefreshView.as_view()),
+    path('/signout', SignoutView.as_view()),
     path('/check', UserIdCheck.as_view()),
 ]
\ No newline at end of file
@@ -1,29 +1,39 @@
-import json
-
 from users.models     import User
-from core.functions   import jwt_generator, signin_decorator
-from core.validations import Validation
+from core             import tokens
+from core.functions   import signin_decorator
+from core.validations import regex_email, regex_password
+from core.schemas     import Schema, Field, String
+from core.responses   import JsonResponse
+from core.hashing     import hashing_pool, HashingBusy
+from core.emails      import email_index
 
-from django.views               import View
-from django.http                import JsonResponse, HttpResponse
-from django.db.utils            import IntegrityError
-from django.core.exceptions     import ValidationError
-from django.contrib.auth        import authenticate
+from django.views                import View
+from django.http                 import HttpResponse
+from django.db.utils             import IntegrityError
+from django.contrib.auth.signals import user_login_failed
+from asgiref.sync                import sync_to_async
 
 
 class SignupView(View):
-    def post(self, request):
+    schema = Schema(
+        name      = String(max_length = 100),
+        email     = String(pattern = regex_email, message = 'not in email format', max_length = 255),
+        is_doctor = Field(),
+        password  = String(pattern = regex_password, message = 'not in password format', max_length = 128)
+    )
+
+    async def post(self, request):
         try:
-            data      = json.loads(request.body)
+            data      = self.schema.load(request.body) #형식이 틀린 요청은 DB 조회/해싱 전에 거절
             name      = data['name']
             email     = data['email']
             is_doctor = data['is_doctor']
             password  = data['password']
 
-            Validation.email_validate(email)
-            Validation.password_validate(password)
+            if await email_index.aexists(email): #중복 이메일은 해싱 전에 거름
+                return JsonResponse({'message' : 'email is already exists'}, status = 400)
             
-            User.objects.create_user(
+            await User.objects.acreate_user(
                 name      = name,
                 password  = password,
                 email     = email,
@@ -41,28 +51,36 @@ class SignupView(View):
         except ValueError as e:
             return JsonResponse({'message' : f'{e}'}, status = 400)
 
-        except ValidationError as e:
-            e = str(e)[2:-2]
-            return JsonResponse({'message' : f'{e}'}, status = 400)
+        except HashingBusy:
+            return JsonResponse({'message' : 'too many requests, try again'}, status = 503)
 
 class EmailUniqueCheckView(View):
+    schema = Schema(email = String(pattern = regex_email, message = 'not in email format', max_length = 255))
+
     def post(self, request):
         try:
-            data      = json.loads(request.body)
-            email     = data['email']
-            if not User.objects.filter(email = email).exists():
+            email = self.schema.load(request.body)['email']
+            if not email_index.exists(email):
                 return JsonResponse({'message' : 'email unique check pass'}, status = 200)
             return JsonResponse({'message' : 'email already exists'}, status = 400)
         except KeyError:
             return JsonResponse({'message' : 'KeyError'}, status = 400)
+        except ValueError as e:
+            return JsonResponse({'message' : f'{e}'}, status = 400)
 
 class SigninView(View):
-    def post(self, request):
-        data     = json.loads(request.body)
-        email    = data['email']
-        password = data['password']
+    schema = Schema(email = String(max_length = 255), password = String(max_length = 128))
 
-        user = authenticate(email=email, password=password)
+    async def post(self, request):
+        try:
+            data = self.schema.load(request.body)
+            user = await self.authenticate(request, data['email'], data['password'])
+        except KeyError:
+            return JsonResponse({'message' : 'KeyError'}, status = 400)
+        except ValueError as e:
+            return JsonResponse({'message' : f'{e}'}, status = 400)
+        except HashingBusy:
+            return JsonResponse({'message' : 'too many requests, try again'}, status = 503)
 
         if user is not None:
             if user.is_doctor == True: 
@@ -71,14 +89,69 @@ class SigninView(View):
                 
                 for browser in browser_list:
                     if browser in app_checking:
-                        return JsonResponse({'message' : 'signin success for doctor', 'token' : jwt_generator(user.id)}, status = 200)
+                        return JsonResponse({'message' : 'signin success for doctor', **await tokens.aissue(user)}, status = 200)
                     else: 
                         return JsonResponse({'message' : 'signin failed because you are not patient'}, status = 400)
-            return JsonResponse({'message' : 'signin success', 'token' : jwt_generator(user.id)}, status = 200)
+            return JsonResponse({'message' : 'signin success', **await tokens.aissue(user)}, status = 200)
             
         else:
             return JsonResponse({'message' : 'check email or password'}, status = 400)
 
+    async def authenticate(self, request, email, password):
+        user = await User.objects.filter(email = email).afirst()
+        if user is None:
+            await hashing_pool.amake(password) #없는 이메일도 응답 시간이 같도록 한 번 해싱
+            return await self.failed(request, email)
+
+        valid, encoded = await hashing_pool.acheck(password, user.password)
+        if not valid:
+            return await self.failed(request, email)
+        if encoded is not None: #해셔 설정이 바뀐 뒤 첫 로그인이면 새 해시로 교체
+            await User.objects.filter(id = user.id).aupdate(password = encoded)
+        return user
+
+    async def failed(self, request, email): #django.contrib.auth.authenticate처럼 실패를 알려 잠금/감사 기능이 동작하도록
+        await sync_to_async(user_login_failed.send)(
+            sender      = __name__,
+            credentials = {'email' : email, 'password' : '********************'},
+            request     = request
+        )
+
+class TokenRefreshView(View):
+    schema = Schema(refresh_token = String(max_length = 64))
+
+    def post(self, request):
+        try:
+            data = self.schema.load(request.body)
+            return JsonResponse({'message' : 'refresh success', **tokens.rotate(data['refresh_token'])}, status = 200)
+
+        except KeyError:
+            return JsonResponse({'message' : 'KeyError'}, status = 400)
+
+        except tokens.InvalidToken as e:
+            return JsonResponse({'message' : f'{e}'}, status = 401)
+
+        except ValueError as e:
+            return JsonResponse({'message' : f'{e}'}, status = 400)
+
+class SignoutView(View):
+    schema = Schema(refresh_token = String(max_length = 64))
+
+    def post(self, request):
+        try:
+            data = self.schema.load(request.body)
+            tokens.revoke(data['refresh_token'])
+            return JsonResponse({'message' : 'signout success'}, status = 200)
+
+        except KeyError:
+            return JsonResponse({'message' : 'KeyError'}, status = 400)
+
+        except tokens.InvalidToken as e:
+            return JsonResponse({'message' : f'{e}'}, status = 401)
+
+        except ValueError as e:
+            return JsonResponse({'message' : f'{e}'}, status = 400)
+
 class UserIdCheck(View):
     @signin_decorator
     def post(self, request):
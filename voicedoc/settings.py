@@ -1,9 +1,18 @@
-import pymysql, os
+import os
 
 from pathlib     import Path
 from my_settings import SECRET_KEY, DATABASES, DEBUG, SECRET, ALGORITHM, IP_ADDRESS, TEST_TOKEN
 
-pymysql.install_as_MySQLdb()
+from django.core.exceptions import ImproperlyConfigured
+
+# MySQL driver : 'pymysql'(pure python) or 'mysqlclient'(C extension)
+DB_DRIVER = os.environ.get('DB_DRIVER', 'pymysql')
+
+if DB_DRIVER not in ('pymysql', 'mysqlclient'):
+    raise ImproperlyConfigured(f"DB_DRIVER must be 'pymysql' or 'mysqlclient', not {DB_DRIVER!r}")
+if DB_DRIVER == 'pymysql':
+    import pymysql
+    pymysql.install_as_MySQLdb()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -36,15 +45,32 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ProfileMiddleware', #세션/인증/메시지 미들웨어는 경로별 프로필에서 실행
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
 ]
 
+SESSION_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+# API_PROFILE=full이면 API 경로도 세션 미들웨어를 거침
+API_PROFILE = os.environ.get('API_PROFILE', 'stateless')
+
+MIDDLEWARE_PROFILES = {
+    'api'  : [] if API_PROFILE == 'stateless' else SESSION_MIDDLEWARE, #JWT로 인증하므로 세션을 읽거나 저장하지 않음
+    'full' : SESSION_MIDDLEWARE,
+}
+
+MIDDLEWARE_PROFILE_PATHS = { #경로 첫 부분 -> 프로필, 나머지 경로는 full
+    'users'        : 'api',
+    'reservations' : 'api',
+}
+
 ROOT_URLCONF = 'voicedoc.urls'
 
 TEMPLATES = [
@@ -71,6 +97,26 @@ WSGI_APPLICATION = 'voicedoc.wsgi.application'
 
 DATABASES = DATABASES
 
+# Persistent connections : reuse a connection for DB_CONN_MAX_AGE seconds instead of reconnecting per request,
+# and let Django check a reused connection before the request uses it (CONN_HEALTH_CHECKS).
+# Off by default : Django advises against persistent connections under ASGI, where sync_to_async threads
+# keep connections Django never closes, so set DB_CONN_MAX_AGE only for the WSGI deployment.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 0))
+
+for database in DATABASES.values():
+    database.setdefault('CONN_MAX_AGE', DB_CONN_MAX_AGE)
+    database.setdefault('CONN_HEALTH_CHECKS', True)
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND'  : 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION' : 'voicedoc',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -135,6 +181,7 @@ CORS_ALLOW_HEADERS = (
     'user-agent',
     'x-csrftoken',
     'x-requested-with',    		
+    'last-event-id',
 )
 
 #Media
@@ -143,6 +190,18 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+IMAGE_STAGING_ROOT = os.path.join(BASE_DIR, 'staging')
+
+IMAGE_INGESTION_MAX_ATTEMPTS  = 5   #실패한 작업은 이 횟수까지 재시도 후 FAILED로 남김
+IMAGE_INGESTION_RETRY_SECONDS = 30  #첫 재시도까지의 대기, 실패할 때마다 두 배
+IMAGE_INGESTION_STALE_SECONDS = 600 #이보다 오래 PROCESSING인 작업은 워커가 죽은 것으로 보고 회수
+
+IMAGE_VARIANT_SIZES = {
+    'small'  : 128,
+    'medium' : 480,
+    'large'  : 1080,
+}
+
 IP_ADDRESS = IP_ADDRESS
 
 #Auth
@@ -160,5 +219,46 @@ SECRET = SECRET
 
 ALGORITHM = ALGORITHM
 
+USER_CACHE_SIZE = 1024
+
+USER_CACHE_TTL  = 60
+
+ACCESS_TOKEN_MINUTES = 15 #액세스 토큰은 DB 조회 없이 검증하므로 짧게 유지
+REFRESH_TOKEN_DAYS   = 14
+
+#Email check : 가입 폼의 이메일 중복 확인은 블룸 필터로 먼저 거름
+
+EMAIL_FILTER_CAPACITY   = 100000
+EMAIL_FILTER_ERROR_RATE = 0.01
+EMAIL_FILTER_REFRESH    = 5    #다른 프로세스에서 가입한 이메일을 가져오는 주기(초)
+EMAIL_FILTER_REBUILD    = 3600 #삭제/변경된 이메일을 비우려고 전체를 다시 읽는 주기(초)
+EMAIL_CHECK_TTL         = 10   #필터에 걸린 이메일의 DB 확인 결과를 재사용하는 시간(초)
+EMAIL_CHECK_CACHE_SIZE  = 4096
+
+#Password : 가입/로그인 해싱은 core.hashing의 프로세스 풀에서 실행 (PASSWORD_HASH_WORKERS=0이면 요청 스레드에서 실행)
+
+# 풀은 웹 워커 프로세스마다 따로 생기므로 전체 해싱 프로세스 수는 (웹 워커 수 x PASSWORD_HASH_WORKERS), 합이 코어 수를 넘지 않게 설정
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(2, os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE   = int(os.environ.get('PASSWORD_HASH_QUEUE', PASSWORD_HASH_WORKERS * 16)) #대기 중인 해싱이 이보다 많으면 503
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+if os.environ.get('PASSWORD_HASHER') == 'argon2': #argon2-cffi 필요, 기존 PBKDF2 해시는 다음 로그인 때 argon2로 바뀜
+    PASSWORD_HASHERS.remove('django.contrib.auth.hashers.Argon2PasswordHasher')
+    PASSWORD_HASHERS.insert(0, 'django.contrib.auth.hashers.Argon2PasswordHasher')
+
+#Events : 예약/슬롯 변경 알림. 프로세스를 여러 개 띄울 때는 같은 인터페이스(publish/since/expired/listen)의 외부 브로커로 교체
+
+EVENT_BROKER      = os.environ.get('EVENT_BROKER', 'core.events.LocalBroker')
+EVENT_BUFFER_SIZE = 1000
+EVENT_WAIT        = 25   #한 요청이 이벤트를 기다리는 최대 시간(초)
+EVENT_RETRY       = 1000 #재접속 대기 시간(ms)
+
 #test
 TEST_TOKEN = TEST_TOKEN
\ No newline at end of file